@@ -0,0 +1,78 @@
+"""OpenAI Batch API helpers for LLM work without a latency requirement.
+
+Batch requests are billed at half the synchronous token price and draw on a
+separate rate-limit pool; results arrive within the 24 h completion window.
+Callers submit a list of `(custom_id, chat.completions body)` pairs and later
+collect `{custom_id: reply content}` once the batch has completed.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+import openai
+
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+
+# Terminal states other than "completed"; collecting such a batch is an error.
+_FAILED_STATES = {"failed", "expired", "cancelled"}
+
+
+def _client():
+    return openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def write_jsonl(requests: List[Tuple[str, Dict[str, Any]]], path: str) -> None:
+    """Write one Batch API request line per `(custom_id, body)` pair."""
+    with open(path, "w", encoding="utf-8") as fh:
+        for custom_id, body in requests:
+            line = {"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body}
+            fh.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+
+def submit(requests: List[Tuple[str, Dict[str, Any]]], metadata: Dict[str, str] | None = None) -> str:
+    """Upload `requests` as a batch input file and start the batch; return its id."""
+    client = _client()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "batch_input.jsonl")
+        write_jsonl(requests, path)
+        with open(path, "rb") as fh:
+            input_file = client.files.create(file=fh, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=ENDPOINT,
+        completion_window=COMPLETION_WINDOW,
+        metadata=metadata,
+    )
+    return batch.id
+
+
+def collect(batch_id: str) -> Dict[str, str] | None:
+    """Return `{custom_id: reply content}`, or None while the batch is running.
+
+    Raises RuntimeError if the batch ended in a failed/expired/cancelled state.
+    Requests that individually errored are omitted from the result.
+    """
+    client = _client()
+    batch = client.batches.retrieve(batch_id)
+    if batch.status in _FAILED_STATES:
+        raise RuntimeError(f"batch {batch_id} ended with status {batch.status}")
+    if batch.status != "completed":
+        return None
+    if not batch.output_file_id:
+        return {}
+    results: Dict[str, str] = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        choices = response.get("body", {}).get("choices") or []
+        if choices:
+            results[record["custom_id"]] = choices[0]["message"]["content"]
+    return results
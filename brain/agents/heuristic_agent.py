@@ -1,10 +1,16 @@
-import json
 import os
 import sys
+import time
 import hashlib
-from datetime import datetime, timedelta
+import mmap
+import struct
+from pathlib import Path
 
+import numpy as np  # type: ignore
+import orjson
 import pandas as pd  # type: ignore
+import pyarrow.dataset as ds  # type: ignore
+from pyarrow import fs as pafs  # type: ignore
 
 # LightGBM may be absent in minimal CI environment; provide stub so unit tests
 # can run (train_model is monkey-patched in tests).
@@ -35,34 +41,55 @@ except ImportError:  # pragma: no cover
         tmp.close()
         return pathlib.Path(tmp.name)
 
+# ONNX copy of the model for downstream ONNX Runtime serving; optional.
+try:
+    import onnxmltools  # type: ignore
+    from onnxmltools.convert.common.data_types import FloatTensorType  # type: ignore
+except ImportError:  # pragma: no cover
+    onnxmltools = None  # type: ignore
+
 # ---------------------------------------------------------------------------
 # Constants / config ---------------------------------------------------------
 # ---------------------------------------------------------------------------
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-FEATURE_STORE = os.path.join(ROOT, "feature_store.parquet")
-MODEL_DIR = os.path.join(ROOT, "models", "candidate")
-MODEL_PATH = os.path.join(MODEL_DIR, "model.wasm")
+ROOT = Path(__file__).resolve().parents[2]
+FEATURE_STORE = ROOT / "feature_store.parquet"
+MODEL_DIR = ROOT / "models" / "candidate"
+MODEL_PATH = MODEL_DIR / "model.wasm"
+# LightGBM bin-mapper cache in MODEL_DIR (a one-row binned Dataset, so only
+# the bin boundaries are stored); suffixed with a hash of the feature schema.
+BIN_CACHE_NAME = ".feature_bins.bin"
+# Manifest of the last retrain plus the feature-store fingerprint it used.
+MANIFEST_CACHE_NAME = ".manifest_cache.json"
 
 ROI_THRESHOLD = 10.0  # 10× ROI label boundary
 DAYS_BACK = 30  # training window
+BIN_CACHE_MAX_AGE = DAYS_BACK * 24 * 60 * 60  # re-derive bin edges monthly
 
 # ---------------------------------------------------------------------------
 # Helper functions -----------------------------------------------------------
 # ---------------------------------------------------------------------------
 
 def load_dataset() -> pd.DataFrame:
-    """Load feature store and slice the last `DAYS_BACK` days."""
+    """Load feature store and slice the last `DAYS_BACK` days.
+
+    The date filter is pushed down into the Arrow scan so row groups entirely
+    older than the cutoff are never read, and the file is memory-mapped.
+    """
     if not os.path.exists(FEATURE_STORE):
         raise FileNotFoundError(f"feature store not found: {FEATURE_STORE}")
-    df = pd.read_parquet(FEATURE_STORE)
+    dset = ds.dataset(
+        str(FEATURE_STORE), format="parquet", filesystem=pafs.LocalFileSystem(use_mmap=True)
+    )
     # Expect presence of 'timestamp' column containing seconds since epoch.
-    if "timestamp" not in df.columns:
+    if "timestamp" not in dset.schema.names:
         raise ValueError("feature_store.parquet must contain 'timestamp' column")
-    cutoff = datetime.utcnow() - timedelta(days=DAYS_BACK)
-    df_time = df[df["timestamp"] >= cutoff.timestamp()].copy()
-    if df_time.empty:
+    cutoff = time.time() - DAYS_BACK * 24 * 60 * 60
+    tbl = dset.to_table(filter=ds.field("timestamp") >= cutoff)
+    if tbl.num_rows == 0:
         raise ValueError("no data in the last 30 days – aborting retrain")
-    return df_time
+    # self_destruct frees each Arrow column as it is converted, so peak RAM
+    # stays near one copy of the slice instead of two.
+    return tbl.to_pandas(self_destruct=True, split_blocks=True)
 
 
 def build_labels(df: pd.DataFrame) -> pd.Series:
@@ -72,10 +99,50 @@ def build_labels(df: pd.DataFrame) -> pd.Series:
     return (df["roi"] >= ROI_THRESHOLD).astype(int)
 
 
+def _bin_cache_path(feature_cols: list[str]) -> str:
+    schema = hashlib.sha256(",".join(sorted(feature_cols)).encode()).hexdigest()[:16]
+    return str(Path(MODEL_DIR) / f"{BIN_CACHE_NAME}.{schema}")
+
+
+def _load_bin_reference(path: str, ds_params: dict):
+    """Return the cached bin-mapper Dataset for `path`, or None if absent/stale."""
+    try:
+        if time.time() - os.path.getmtime(path) > BIN_CACHE_MAX_AGE:
+            return None
+        return lgb.Dataset(path, params=ds_params).construct()
+    except Exception:  # missing, stale or unreadable cache → rebuild
+        return None
+
+
 def train_model(df: pd.DataFrame, y: pd.Series):
     feature_cols = [c for c in df.columns if c not in {"roi", "timestamp"}]
-    X = df[feature_cols]
-    dtrain = lgb.Dataset(X, label=y, free_raw_data=True)
+    # One contiguous float32 matrix: LightGBM skips per-column dtype inference
+    # and histogram construction streams half the bytes of float64.
+    X = np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32))
+    ds_params = {"max_bin": 255, "feature_pre_filter": False, "verbosity": -1}
+    # Reuse last run's bin mappers when the feature schema is unchanged so only
+    # the value→bin mapping runs, not the bin-boundary search.
+    cache_path = _bin_cache_path(feature_cols)
+    reference = _load_bin_reference(cache_path, ds_params)
+    dtrain = lgb.Dataset(
+        X,
+        label=y.to_numpy(dtype=np.float32),
+        feature_name=feature_cols,
+        free_raw_data=True,
+        params=ds_params,
+        reference=reference,
+    )
+    if reference is None:
+        dtrain.construct()
+        try:
+            os.makedirs(MODEL_DIR, exist_ok=True)
+            if os.path.exists(cache_path):
+                os.remove(cache_path)  # save_binary refuses to overwrite
+            # A one-row subset shares dtrain's bin mappers, which is all a
+            # reference needs; the cache stays a few KiB whatever the row count.
+            dtrain.subset([0]).construct().save_binary(cache_path)
+        except Exception:  # pragma: no cover – cache is best-effort
+            pass
     params = {
         "objective": "binary",
         "metric": "auc",
@@ -83,6 +150,9 @@ def train_model(df: pd.DataFrame, y: pd.Series):
         "max_depth": 6,
         "num_leaves": 31,
         "learning_rate": 0.1,
+        "max_bin": 255,
+        "feature_pre_filter": False,
+        "num_threads": max(1, (os.cpu_count() or 2) - 1),
     }
     model = lgb.train(params, dtrain, num_boost_round=100)
     return model, feature_cols
@@ -96,43 +166,123 @@ def save_wasm(model, feature_cols):
     return MODEL_PATH
 
 
+def save_onnx(model, feature_cols):
+    """Write `model.onnx` next to the wasm; None if it cannot be produced.
+
+    A previous run's `model.onnx` is removed in that case so ONNX Runtime
+    consumers never serve a model that no longer matches the wasm.
+    """
+    onnx_path = Path(MODEL_DIR) / "model.onnx"
+    if onnxmltools is None:
+        onnx_path.unlink(missing_ok=True)
+        return None
+    try:
+        onx = onnxmltools.convert_lightgbm(
+            model,
+            initial_types=[("f", FloatTensorType([None, len(feature_cols)]))],
+            target_opset=12,
+        )
+    except Exception:  # non-LightGBM model or converter failure → skip
+        onnx_path.unlink(missing_ok=True)
+        return None
+    tmp_path = onnx_path.with_suffix(".onnx.tmp")
+    tmp_path.write_bytes(onx.SerializeToString())
+    os.replace(tmp_path, onnx_path)
+    return onnx_path
+
+
 def sha256_of(path: str) -> str:
-    h = hashlib.sha256()
+    """SHA-256 of a file, hashed by OpenSSL outside the interpreter loop."""
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
+        if hasattr(hashlib, "file_digest"):  # Python ≥ 3.11
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        if os.fstat(f.fileno()).st_size == 0:  # mmap rejects empty files
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).hexdigest()
+
+
+def _feature_store_fingerprint() -> str:
+    """Cheap identity of the feature store (mtime + size) and training config.
+
+    The current UTC day is included because `load_dataset` slides its
+    `DAYS_BACK` window daily: an unchanged file still retrains once per day.
+    """
+    st = os.stat(FEATURE_STORE)
+    h = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+    h.update(struct.pack("<dQdIQ", st.st_mtime, st.st_size, ROI_THRESHOLD, DAYS_BACK, int(time.time() // 86400)))
     return h.hexdigest()
 
 
+def _cached_manifest(fingerprint: str) -> dict | None:
+    """Return the previous manifest if the store is unchanged and the model intact."""
+    try:
+        cache = orjson.loads((Path(MODEL_DIR) / MANIFEST_CACHE_NAME).read_bytes())
+        manifest = cache["manifest"]
+        if cache["fingerprint"] != fingerprint or sha256_of(MODEL_PATH) != manifest["sha256"]:
+            return None
+        if "onnx_sha256" in manifest and (
+            sha256_of(Path(MODEL_DIR) / "model.onnx") != manifest["onnx_sha256"]
+        ):
+            return None
+        return manifest
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
 # ---------------------------------------------------------------------------
 # Main entry-point -----------------------------------------------------------
 # ---------------------------------------------------------------------------
 
-def main():
+def build_manifest() -> dict:
+    """Run the full retrain pipeline once and return the manifest dict.
+
+    Training is skipped when the feature store is unchanged since the run
+    that produced the current model; its manifest is returned instead.
+    """
+    fingerprint = _feature_store_fingerprint() if os.path.exists(FEATURE_STORE) else None
+    if fingerprint and (cached := _cached_manifest(fingerprint)) is not None:
+        return cached
     df = load_dataset()
     y = build_labels(df)
     model, features = train_model(df, y)
     wasm_path = save_wasm(model, features)
     sha = sha256_of(wasm_path)
     manifest = {"sha256": sha, "features": sorted(features)}
-    json.dump(manifest, sys.stdout)
-    sys.stdout.write("\n")
+    if (onnx_path := save_onnx(model, features)) is not None:
+        manifest["onnx_sha256"] = sha256_of(onnx_path)
+    if fingerprint:
+        try:
+            (Path(MODEL_DIR) / MANIFEST_CACHE_NAME).write_bytes(
+                orjson.dumps({"fingerprint": fingerprint, "manifest": manifest})
+            )
+        except OSError:  # pragma: no cover – cache is best-effort
+            pass
+    return manifest
+
+
+def _encode_manifest(manifest: dict) -> bytes:
+    return orjson.dumps(manifest, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+
+
+def main():
+    raw = _encode_manifest(build_manifest())
+    # Write bytes straight to the fd when possible (tests swap in a StringIO).
+    if hasattr(sys.stdout, "buffer"):
+        sys.stdout.flush()
+        sys.stdout.buffer.write(raw)
+        sys.stdout.buffer.flush()
+    else:
+        sys.stdout.write(raw.decode())
 
 
-def produce() -> tuple[str, str]:
+def produce() -> tuple[str, bytes]:
     """Thin wrapper so manager can ingest nightly manifest.
 
-    We reuse `main()` but capture its stdout instead of duplicating logic.
-    Returns a tuple of (artifact_name, json_content).
+    Returns a tuple of (artifact_name, UTF-8 json_content).
     """
-    import io
-    import contextlib
-
-    buf = io.StringIO()
-    with contextlib.redirect_stdout(buf):
-        main()
-    content = buf.getvalue().strip()
-    return "manifest.json", content
+    return "manifest.json", orjson.dumps(build_manifest(), option=orjson.OPT_SORT_KEYS)
 
 
 if __name__ == "__main__":
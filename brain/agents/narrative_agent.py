@@ -1,8 +1,11 @@
+import asyncio
 import json
 import os
 import sys
 import datetime as _dt
+import functools
 import time
+from pathlib import Path
 from typing import List, Dict, Tuple
 
 # Third-party HTTP client – lightweight and async-friendly
@@ -11,171 +14,359 @@ try:
 except ImportError:  # pragma: no cover – CI installs dependency
     httpx = None  # type: ignore
 
+# HTTP/2 needs the optional `h2` package (httpx[http2]); HTTP/1.1 otherwise.
+try:
+    import h2  # type: ignore  # noqa: F401
+    HTTP2 = True
+except ImportError:  # pragma: no cover – optional
+    HTTP2 = False
+
+# Optional C multi-pattern matcher; the heuristic scorer falls back to
+# vectorised NumPy string search when pyahocorasick is absent.
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pragma: no cover – optional accelerator
+    ahocorasick = None  # type: ignore
+
+import numpy as np  # type: ignore
 import openai
+import orjson
 from prometheus_client import Counter
 
+ROOT = Path(__file__).resolve().parents[2]
+ARTIFACTS = ROOT / "artifacts"
+
 TWITTER_BEARER: str | None = os.getenv("TWITTER_BEARER")
 USE_LLM = os.getenv("USE_LLM", "false").lower() == "true"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+LLM_MODEL = os.getenv("NARRATIVE_LLM_MODEL", "gpt-4o-mini")
 llm_call_total = Counter("llm_call_total", "Total LLM calls", ["agent", "platform"])
 
 # --- Platform Specific Keywords ---
-PUMPFUN_KEYWORDS = "pump.fun OR pumpfun"
-LETSBONK_KEYWORDS = "letsbonk OR bonk"
+PLATFORM_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "pumpfun": ("pump.fun", "pumpfun"),
+    "letsbonk": ("letsbonk", "bonk"),
+}
+PUMPFUN_KEYWORDS = " OR ".join(PLATFORM_KEYWORDS["pumpfun"])
+LETSBONK_KEYWORDS = " OR ".join(PLATFORM_KEYWORDS["letsbonk"])
+
+# Shared search results are reused for this many seconds across platforms.
+CORPUS_TTL_SEC = 60
+_corpus_cache: Dict[Tuple[Tuple[str, ...], int, int], Tuple[float, List[str]]] = {}
+
+# Twitter pacing: epoch seconds before which the next search should not start,
+# derived from the x-rate-limit-* headers of the previous response.
+RATE_LIMIT_MAX_WAIT_SEC = 60
+_next_allowed_ts = 0.0
+
+# --- Narrative categories (order is significant: automaton values index it) ---
+NARRATIVE_CATEGORIES: Tuple[str, ...] = (
+    "pepe", "doge", "shiba", "floki", "wojak", "bonk", "elon", "turbo", "dogwifhat", "jeo", "popcat", "catcoin", "mog", "pnd", "baby", "grok", "tate", "base", "blast",
+    "moon", "pump", "rug", "airdrop", "degen", "rekt", "gm", "wagmi", "lfg", "100x", "ath", "scam", "presale", "launch", "trending", "viral",
+    "solana", "eth", "ethereum", "layerzero", "arbitrum", "optimism", "polygon", "bsc",
+    "pump.fun", "letsbonk",  # platform keywords
+)
+
+
+def _build_automaton():
+    """Compile all categories into one Aho-Corasick automaton (None if unavailable)."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for idx, keyword in enumerate(NARRATIVE_CATEGORIES):
+        automaton.add_word(keyword.lower(), idx)
+    automaton.make_automaton()
+    return automaton
+
+
+_AUTOMATON = _build_automaton()
+
 
 # ---------------------------------------------------------------------------
 # Helper functions -----------------------------------------------------------
 # ---------------------------------------------------------------------------
 
-def _fetch_recent_tweets(
-    platform: str, minutes: int = 10, max_results: int = 100
-) -> List[str]:
-    """Pull recent Tweets that mention any narrative keyword for a specific platform.
+def _platform_phrase(platform: str) -> str:
+    return f"{platform} viral memecoin July 2025"
 
-    Down-grades gracefully (returns empty list) if `TWITTER_BEARER` unset or
-    `httpx` missing.  This keeps unit tests hermetic and avoids hard network
-    dependencies in CI.
-    """
-    if TWITTER_BEARER is None or httpx is None:
-        return []
 
-    endpoint = "https://api.twitter.com/2/tweets/search/recent"
-    
+def _build_query(platforms: Tuple[str, ...]) -> str:
+    """One Twitter search query covering every platform in `platforms`."""
     # Base query for general crypto trends
     base_query = (
         "pepe OR doge OR shiba OR floki OR wojak OR bonk OR elon OR turbo OR dogwifhat OR jeo OR popcat OR catcoin OR mog OR pnd OR baby OR grok OR tate OR base OR blast "
         "OR moon OR pump OR rug OR airdrop OR degen OR rekt OR gm OR wagmi OR lfg OR 100x OR ath OR scam OR presale OR launch OR trending OR viral "
         "OR solana OR eth OR ethereum OR layerzero OR arbitrum OR optimism OR polygon OR bsc lang:en -is:retweet"
     )
+    # A platform without dedicated keywords needs the unrestricted base query.
+    if not platforms or any(p not in PLATFORM_KEYWORDS for p in platforms):
+        return base_query
 
-    # Add platform-specific keywords
-    if platform == "pumpfun":
-        platform_keywords = PUMPFUN_KEYWORDS
-    elif platform == "letsbonk":
-        platform_keywords = LETSBONK_KEYWORDS
-    else:
-        platform_keywords = ""
-
-    # Construct the final query
     # Example for pumpfun: "((...base_query...) AND (pump.fun OR pumpfun)) OR (\"pump.fun viral memecoin July 2025\")"
-    platform_search_phrase = f'"{platform} viral memecoin July 2025"'
-    if platform_keywords:
-        query = f"(({base_query}) AND ({platform_keywords})) OR ({platform_search_phrase})"
-    else:
-        query = base_query
+    platform_keywords = " OR ".join(kw for p in platforms for kw in PLATFORM_KEYWORDS[p])
+    phrases = " OR ".join(f'"{_platform_phrase(p)}"' for p in platforms)
+    return f"(({base_query}) AND ({platform_keywords})) OR ({phrases})"
+
+
+def _filter_for_platform(tweets: List[str], platform: str) -> List[str]:
+    """Select the shared-corpus tweets that the per-platform query would match."""
+    keywords = PLATFORM_KEYWORDS.get(platform)
+    if keywords is None:
+        return list(tweets)
+    needles = keywords + (_platform_phrase(platform).lower(),)
+    selected = []
+    for t in tweets:
+        lower = t.lower()
+        if any(n in lower for n in needles):
+            selected.append(t)
+    return selected
+
+
+def _header_float(headers, name: str, default: float) -> float:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return default
+
 
+def _next_allowed_ts_from(headers) -> float:
+    """Spread the remaining request budget evenly over the rate-limit window."""
+    now = time.time()
+    remaining = _header_float(headers, "x-rate-limit-remaining", -1)
+    reset = _header_float(headers, "x-rate-limit-reset", now)
+    if remaining < 0:
+        return now
+    return now + max(0.0, reset - now) / max(remaining, 1.0)
 
+
+def _pacing_wait() -> float:
+    """Seconds to sleep before the next search, capped at `RATE_LIMIT_MAX_WAIT_SEC`."""
+    return min(RATE_LIMIT_MAX_WAIT_SEC, max(0.0, _next_allowed_ts - time.time()))
+
+
+async def _fetch_recent_tweets(
+    platforms: Tuple[str, ...], minutes: int = 10, max_results: int = 100, client=None
+) -> List[str]:
+    """Pull recent Tweets that mention any narrative keyword for the given platforms.
+
+    A single search with the union query serves all platforms; results are
+    cached for `CORPUS_TTL_SEC` so repeated calls hit the rate-limited API once.
+
+    Down-grades gracefully (returns empty list) if `TWITTER_BEARER` unset or
+    `httpx` missing.  This keeps unit tests hermetic and avoids hard network
+    dependencies in CI.  Pass a shared `httpx.AsyncClient` to reuse its
+    connection pool.
+    """
+    if TWITTER_BEARER is None or httpx is None:
+        return []
+    key = (platforms, minutes, max_results)
+    cached = _corpus_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < CORPUS_TTL_SEC:
+        return cached[1]
+    if client is None:
+        async with httpx.AsyncClient(http2=HTTP2, timeout=10) as own_client:
+            return await _fetch_recent_tweets(platforms, minutes, max_results, own_client)
+
+    endpoint = "https://api.twitter.com/2/tweets/search/recent"
+    query = _build_query(platforms)
     since = (_dt.datetime.utcnow() - _dt.timedelta(minutes=minutes)).isoformat("T") + "Z"
     headers = {"Authorization": f"Bearer {TWITTER_BEARER}"}
     params = {"query": query, "max_results": max_results, "start_time": since, "tweet.fields": "text"}
 
+    global _next_allowed_ts
     attempts = 0
     while attempts < 3:
         try:
-            r = httpx.get(endpoint, headers=headers, params=params, timeout=10)
+            # Pace proactively instead of waiting to be throttled; other
+            # coroutines keep running while we sleep.
+            await asyncio.sleep(_pacing_wait())
+            r = await client.get(endpoint, headers=headers, params=params)
+            _next_allowed_ts = _next_allowed_ts_from(r.headers)
             if r.status_code == 429:
-                # Twitter returns epoch seconds in x-rate-limit-reset
-                reset_epoch = int(r.headers.get("x-rate-limit-reset", "2"))
-                wait = max(0, reset_epoch - int(time.time()))
-                time.sleep(min(60, wait * (2 ** attempts)))
+                # x-rate-limit-reset is an absolute epoch, so no exponential
+                # multiplier: the pacing sleep above waits until then.
+                _next_allowed_ts = _header_float(r.headers, "x-rate-limit-reset", time.time() + 2)
                 attempts += 1
                 continue
             r.raise_for_status()
             data = r.json()
-            return [tweet["text"] for tweet in data.get("data", []) if "text" in tweet]
+            tweets = [tweet["text"] for tweet in data.get("data", []) if "text" in tweet]
+            _corpus_cache[key] = (time.monotonic(), tweets)
+            return tweets
         except Exception as e:  # pragma: no cover – network or JSON failures
-            print(f"Error fetching tweets for {platform}: {e}")
+            print(f"Error fetching tweets for {', '.join(platforms)}: {e}")
             return []
     return []
 
 
 def _score_narratives_heuristic(texts: List[str]) -> Dict[str, float]:
-    """Heuristic scoring: keyword frequency for DeFi/meme/crypto trends."""
-    categories = {
-        "pepe": 0, "doge": 0, "shiba": 0, "floki": 0, "wojak": 0, "bonk": 0, "elon": 0, "turbo": 0, "dogwifhat": 0, "jeo": 0, "popcat": 0, "catcoin": 0, "mog": 0, "pnd": 0, "baby": 0, "grok": 0, "tate": 0, "base": 0, "blast": 0,
-        "moon": 0, "pump": 0, "rug": 0, "airdrop": 0, "degen": 0, "rekt": 0, "gm": 0, "wagmi": 0, "lfg": 0, "100x": 0, "ath": 0, "scam": 0, "presale": 0, "launch": 0, "trending": 0, "viral": 0,
-        "solana": 0, "eth": 0, "ethereum": 0, "layerzero": 0, "arbitrum": 0, "optimism": 0, "polygon": 0, "bsc": 0,
-        "pump.fun": 0, "letsbonk": 0, # Added platform keywords
-    }
+    """Heuristic scoring: keyword frequency for DeFi/meme/crypto trends.
+
+    Each tweet counts at most once per category.  With pyahocorasick every
+    tweet is scanned in one C-level pass; otherwise the lowercased batch is
+    packed once into a NumPy string array and each keyword is searched
+    across all tweets in a single vectorised call.
+    """
     if not texts:
-        return {k: 0.0 for k in categories}
-    for txt in texts:
-        lower = txt.lower()
-        for k in categories:
-            if k in lower:
-                categories[k] += 1
-    total = len(texts)
-    return {k: round(v / total, 3) for k, v in categories.items()}
-
-
-def _score_narratives_llm(texts: List[str], platform: str) -> Dict[str, float]:
-    """LLM scoring: call OpenAI GPT-4 for narrative scoring."""
+        return dict.fromkeys(NARRATIVE_CATEGORIES, 0.0)
+    if _AUTOMATON is not None:
+        hits: List[int] = []
+        for txt in texts:
+            hits.extend({idx for _, idx in _AUTOMATON.iter(txt.lower())})
+        counts = np.bincount(np.asarray(hits, dtype=np.intp), minlength=len(NARRATIVE_CATEGORIES))
+    else:
+        # Lowercase in Python first: np.char.lower keeps the fixed width and
+        # truncates strings that grow (e.g. 'İ' → 'i̇').
+        arr = np.asarray([t.lower() for t in texts], dtype=np.str_)
+        counts = np.fromiter(
+            (np.count_nonzero(np.char.find(arr, k) >= 0) for k in NARRATIVE_CATEGORIES),
+            dtype=np.int64,
+            count=len(NARRATIVE_CATEGORIES),
+        )
+    freqs = (counts / len(texts)).tolist()
+    return {k: round(v, 3) for k, v in zip(NARRATIVE_CATEGORIES, freqs)}
+
+
+@functools.lru_cache(maxsize=1)
+def _openai_client() -> "openai.OpenAI":
+    """Shared OpenAI client so TLS/connection pool setup is paid once."""
+    return openai.OpenAI(api_key=OPENAI_API_KEY)
+
+
+def _score_narratives_llm(corpora: Dict[str, List[str]]) -> Dict[str, Dict[str, float]]:
+    """LLM scoring: one OpenAI call scores every platform's tweets at once.
+
+    Returns `{platform: {category: score}}`; a single round-trip replaces one
+    call per platform.  Platforms missing from the reply fall back to the
+    heuristic scorer rather than scoring zero.
+    """
     if not OPENAI_API_KEY:
         raise RuntimeError("USE_LLM=true but OPENAI_API_KEY is not set!")
-    openai.api_key = OPENAI_API_KEY
-    categories = [
-        "pepe", "doge", "shiba", "floki", "wojak", "bonk", "elon", "turbo", "dogwifhat", "jeo", "popcat", "catcoin", "mog", "pnd", "baby", "grok", "tate", "base", "blast",
-        "moon", "pump", "rug", "airdrop", "degen", "rekt", "gm", "wagmi", "lfg", "100x", "ath", "scam", "presale", "launch", "trending", "viral",
-        "solana", "eth", "ethereum", "layerzero", "arbitrum", "optimism", "polygon", "bsc",
-        "pump.fun", "letsbonk",
-    ]
-    prompt = f"You are analyzing social media sentiment for crypto trading on the '{platform}' platform. Score the following tweets for these categories: {categories}. Tweets: {json.dumps(texts)}. Return a JSON object with category keys and float values between 0 and 1, reflecting the relevance and intensity for the '{platform}' context. Focus on signals relevant to '{platform} viral memecoin July 2025'."
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
+    categories = list(NARRATIVE_CATEGORIES)
+    platforms = list(corpora)
+    # Overlapping search results repeat tweets; dedupe to cut prompt tokens.
+    payload = {p: list(dict.fromkeys(texts)) for p, texts in corpora.items()}
+    prompt = (
+        f"You are analyzing social media sentiment for crypto trading on these platforms: {platforms}. "
+        f"For each platform, score its tweets for these categories: {categories}. "
+        f"Tweets by platform: {json.dumps(payload)}. "
+        "Return a JSON object keyed by platform, each value an object with category keys and float "
+        "values between 0 and 1, reflecting the relevance and intensity for that platform's context. "
+        "Focus on signals relevant to '<platform> viral memecoin July 2025'."
+    )
+    response = _openai_client().chat.completions.create(
+        model=LLM_MODEL,
         messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"},
         temperature=0.2,
-        max_tokens=512,
+        max_tokens=512 * len(platforms),
     )
-    llm_call_total.labels(agent="narrative", platform=platform).inc()
+    # One series per platform, as before batching, so dashboards keep working.
+    for p in platforms:
+        llm_call_total.labels(agent="narrative", platform=p).inc()
     result = json.loads(response.choices[0].message.content)
-    return {k: round(float(result.get(k, 0)), 3) for k in categories}
+    scores: Dict[str, Dict[str, float]] = {}
+    for p in platforms:
+        if not isinstance(result.get(p), dict):
+            print(f"[WARN] LLM reply omitted {p}. Falling back to heuristic.")
+            scores[p] = _score_narratives_heuristic(corpora[p])
+            continue
+        scores[p] = {k: round(float(result[p].get(k, 0)), 3) for k in categories}
+    return scores
 
 
-def score_narratives(texts: List[str], platform: str) -> Dict[str, float]:
-    """Compute per-narrative score between 0 and 1, using LLM if enabled."""
-    if USE_LLM:
+def score_all_narratives(corpora: Dict[str, List[str]]) -> Dict[str, Dict[str, float]]:
+    """Score several platforms' tweets, batching the LLM path into one call."""
+    if USE_LLM and corpora:
         try:
-            return _score_narratives_llm(texts, platform)
+            return _score_narratives_llm(corpora)
         except Exception as e:
             # Log error, fallback to heuristic
-            print(f"[WARN] LLM scoring for {platform} failed: {e}. Falling back to heuristic.")
-    return _score_narratives_heuristic(texts)
+            print(f"[WARN] LLM scoring for {', '.join(corpora)} failed: {e}. Falling back to heuristic.")
+    return {p: _score_narratives_heuristic(texts) for p, texts in corpora.items()}
+
+
+def score_narratives(texts: List[str], platform: str) -> Dict[str, float]:
+    """Compute per-narrative score between 0 and 1, using LLM if enabled."""
+    return score_all_narratives({platform: texts})[platform]
+
+
+# Scores are quantised to one byte per category (v / QUANT_SCALE recovers the
+# score to ±0.002, i.e. the 3-decimal precision of the JSON artifact).
+QUANT_SCALE = 250.0
+
+
+def quantize_scores(scores: Dict[str, float]) -> bytes:
+    """Pack scores, clipped to [0, 1], into a uint8 array ordered by `NARRATIVE_CATEGORIES`."""
+    vals = np.fromiter((scores.get(k, 0.0) for k in NARRATIVE_CATEGORIES), dtype=np.float64)
+    return np.rint(np.clip(vals, 0.0, 1.0) * QUANT_SCALE).astype(np.uint8).tobytes()
+
+
+def dequantize_scores(raw: bytes) -> Dict[str, float]:
+    """Inverse of `quantize_scores`."""
+    vals = np.frombuffer(raw, dtype=np.uint8) / QUANT_SCALE
+    return {k: round(float(v), 3) for k, v in zip(NARRATIVE_CATEGORIES, vals)}
 
 
 # ---------------------------------------------------------------------------
 # Artifact production API (called by manager) -------------------------------
 # ---------------------------------------------------------------------------
 
-def produce() -> List[Tuple[str, str]]:
-    """Return a list of (filename, JSON content string) tuples for each platform."""
+async def _fetch_all_platforms(platforms: List[str]) -> List[List[str]]:
+    """Fetch the shared corpus once and split it into per-platform tweet lists."""
+    tweets = await _fetch_recent_tweets(tuple(platforms))
+    return [_filter_for_platform(tweets, p) for p in platforms]
+
+
+def _write_schema(artifacts_dir: Path) -> None:
+    """Write the category order of the `.bin` artifacts unless already current."""
+    path = artifacts_dir / "narrative_schema.json"
+    raw = orjson.dumps({"categories": NARRATIVE_CATEGORIES, "scale": QUANT_SCALE})
+    try:
+        with open(path, "rb") as fh:
+            if fh.read() == raw:
+                return
+    except FileNotFoundError:
+        pass
+    with open(path, "wb") as fh:
+        fh.write(raw)
+
+
+def _write_platform_artifacts(artifacts_dir: Path, platform: str, scores: Dict[str, float]) -> Tuple[str, bytes]:
+    """Write one platform's JSON + quantised artifacts; return (filename, JSON bytes)."""
+    filename = f"narrative_scores_{platform}.json"
+    # Encode once; the same bytes are written and returned.
+    raw = orjson.dumps(scores, option=orjson.OPT_SORT_KEYS)
+    with open(artifacts_dir / filename, "wb") as fh:
+        fh.write(raw)
+    # Compact twin: one byte per category, order given by the schema file.
+    with open(artifacts_dir / f"narrative_scores_{platform}.bin", "wb") as fh:
+        fh.write(quantize_scores(scores))
+    return filename, raw
+
+
+def produce() -> List[Tuple[str, bytes]]:
+    """Return a list of (filename, UTF-8 JSON bytes) tuples for each platform."""
     platforms_str = os.getenv("PLATFORMS", "pumpfun,letsbonk")
     platforms = [p.strip() for p in platforms_str.split(',') if p.strip()]
-    artifacts = []
-    
-    for platform in platforms:
+    corpora: Dict[str, List[str]] = {}
+    for platform, tweets in zip(platforms, asyncio.run(_fetch_all_platforms(platforms))):
         print(f"Producing narrative scores for platform: {platform}")
-        tweets = _fetch_recent_tweets(platform=platform)
         if not tweets:
             print(f"No tweets found for {platform}, skipping artifact generation.")
             continue
-            
-        scores = score_narratives(tweets, platform=platform)
-        
-        # Write artifact to strict path: repo_root/artifacts/narrative_scores_{platform}.json
-        repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-        artifacts_dir = os.path.join(repo_root, "artifacts")
-        os.makedirs(artifacts_dir, exist_ok=True)
-        
-        filename = f"narrative_scores_{platform}.json"
-        path = os.path.join(artifacts_dir, filename)
-        content = json.dumps(scores, separators=",:", sort_keys=True)
-        
-        with open(path, "w", encoding="utf-8") as fh:
-            fh.write(content)
-            
-        artifacts.append((filename, content))
-        
-    return artifacts
+        corpora[platform] = tweets
+    if not corpora:
+        return []
+
+    # Write artifacts to strict path: repo_root/artifacts/narrative_scores_{platform}.json
+    ARTIFACTS.mkdir(parents=True, exist_ok=True)
+    _write_schema(ARTIFACTS)
+
+    # Scoring is one batched call; the per-platform writes are two small
+    # files each, cheaper inline than a thread pool's start-up.
+    scored = score_all_narratives(corpora)
+    return [_write_platform_artifacts(ARTIFACTS, platform, scores) for platform, scores in scored.items()]
 
 
 # ---------------------------------------------------------------------------
@@ -186,7 +377,7 @@ def main() -> None:  # pragma: no cover – exercised via produce() in tests
     artifacts = produce()
     # For CLI, just print the content of the first artifact
     if artifacts:
-        sys.stdout.write(artifacts[0][1] + "\n")
+        sys.stdout.write(artifacts[0][1].decode() + "\n")
 
 
 if __name__ == "__main__":
@@ -1,43 +1,204 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import re
+from pathlib import Path
 from typing import Tuple, Dict
 
 import yaml  # type: ignore
 
+try:
+    from yaml import CSafeDumper as SafeDumper  # type: ignore
+except ImportError:  # pragma: no cover – PyYAML built without libyaml
+    from yaml import SafeDumper  # type: ignore
+
 try:
     import httpx  # type: ignore
 except ImportError:  # pragma: no cover – tests monkey-patch
     httpx = None  # type: ignore
 
+try:
+    import h2  # type: ignore  # noqa: F401
+    HTTP2 = True
+except ImportError:  # pragma: no cover – optional
+    HTTP2 = False
+
+# Optional JIT for very large scrape pages; the regex path covers the rest.
+try:
+    import numba  # type: ignore
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover – optional accelerator
+    numba = None  # type: ignore
+
 # ---------------------------------------------------------------------------
 # Constants ------------------------------------------------------------------
 # ---------------------------------------------------------------------------
 
 PROMETHEUS_URL = os.getenv("PROMETHEUS_URL", "http://localhost:9090/metrics")
 BASELINE_TICKET_SIZE = int(os.getenv("BASELINE_TICKET_SIZE", "10"))
+ARTIFACTS = Path(__file__).resolve().parents[2] / "artifacts"
+
+# Matches `<counter>{labels} <value>` samples for the two counters we track.
+_METRIC_RE = re.compile(
+    r"^[ \t]*(trade_hit_total|trades_submitted_total)\S*[ \t]+(\S+)", re.MULTILINE
+)
+# Pages at least this large go through the Numba scanner when available.
+JIT_MIN_BYTES = 256 * 1024
+# The scanner accumulates in int64; values or sums past these bounds send the
+# page back to the regex path.  2**53 keeps it bit-identical to int(float(v)).
+_JIT_MAX_SIG_DIGITS = 18
+_JIT_MAX_VALUE = 2**53
+_JIT_MAX_SUM = 2**62
 
 # ---------------------------------------------------------------------------
 # Metric helpers -------------------------------------------------------------
 # ---------------------------------------------------------------------------
 
-def _parse_metrics(text: str) -> Tuple[int, int]:
-    """Return (hit, total) counters parsed from Prometheus exposition text."""
+def _scan_metrics(buf, hit_name, sub_name):  # pragma: no cover – compiled by Numba
+    """Byte-level equivalent of `_METRIC_RE` + int(float(value)) accumulation.
+
+    Values are parsed as decimal mantissa/exponent integers, so whole counts
+    are exact; NaN/Inf and malformed tokens are skipped like the regex path.
+    Returns `(hit, total, exact)`; `exact` is False when a mantissa, value or
+    sum would leave the int64-safe range, and the counts are then unusable.
+    """
+    n = buf.size
+    hit = 0
+    total = 0
+    i = 0
+    while i < n:
+        j = i
+        while j < n and (buf[j] == 32 or buf[j] == 9):
+            j += 1
+        kind = 0
+        for name, k in ((hit_name, 1), (sub_name, 2)):
+            m = name.size
+            if j + m <= n:
+                same = True
+                for q in range(m):
+                    if buf[j + q] != name[q]:
+                        same = False
+                        break
+                if same:
+                    kind = k
+                    j += m
+                    break
+        if kind != 0:
+            # \S* (labels) then [ \t]+ then the value token \S+
+            while j < n and not (buf[j] == 32 or 9 <= buf[j] <= 13):
+                j += 1
+            k = j
+            while k < n and (buf[k] == 32 or buf[k] == 9):
+                k += 1
+            end = k
+            while end < n and not (buf[end] == 32 or 9 <= buf[end] <= 13):
+                end += 1
+            if k > j and end > k:
+                p = k
+                neg = False
+                if buf[p] == 43 or buf[p] == 45:  # + / -
+                    neg = buf[p] == 45
+                    p += 1
+                digits = 0
+                ndigits = 0
+                sig = 0
+                scale = 0
+                seen_dot = False
+                while p < end and (48 <= buf[p] <= 57 or (buf[p] == 46 and not seen_dot)):
+                    if buf[p] == 46:
+                        seen_dot = True
+                    else:
+                        if digits > 0 or buf[p] != 48:
+                            sig += 1
+                            if sig > _JIT_MAX_SIG_DIGITS:
+                                return hit, total, False
+                        digits = digits * 10 + (buf[p] - 48)
+                        ndigits += 1
+                        if seen_dot:
+                            scale -= 1
+                    p += 1
+                ok = ndigits > 0
+                if ok and p < end and (buf[p] == 101 or buf[p] == 69):  # e / E
+                    p += 1
+                    eneg = False
+                    if p < end and (buf[p] == 43 or buf[p] == 45):
+                        eneg = buf[p] == 45
+                        p += 1
+                    exp = 0
+                    edigits = 0
+                    while p < end and 48 <= buf[p] <= 57:
+                        exp = exp * 10 + (buf[p] - 48)
+                        edigits += 1
+                        p += 1
+                    ok = edigits > 0
+                    scale += -exp if eneg else exp
+                if ok and p == end:
+                    while scale > 0 and digits > 0:
+                        if digits >= _JIT_MAX_VALUE:
+                            return hit, total, False
+                        digits *= 10
+                        scale -= 1
+                    while scale < 0 and digits > 0:
+                        digits //= 10
+                        scale += 1
+                    if digits >= _JIT_MAX_VALUE:
+                        return hit, total, False
+                    value = -digits if neg else digits
+                    if kind == 1:
+                        hit += value
+                    else:
+                        total += value
+                    if abs(hit) > _JIT_MAX_SUM or abs(total) > _JIT_MAX_SUM:
+                        return hit, total, False
+        while i < n and buf[i] != 10:
+            i += 1
+        i += 1
+    return hit, total, True
+
+
+if numba is not None:
+    # Explicit signature: compiled (or loaded from cache) at import instead of
+    # on the first large scrape.  Buffers are read-only views of bytes.
+    _BYTES = numba.types.Array(numba.types.uint8, 1, "C", readonly=True)
+    _scan_metrics_jit = numba.njit(
+        numba.types.Tuple((numba.types.int64, numba.types.int64, numba.types.boolean))(_BYTES, _BYTES, _BYTES),
+        cache=True,
+        nogil=True,
+    )(_scan_metrics)
+    _HIT_NAME = np.frombuffer(b"trade_hit_total", dtype=np.uint8)
+    _SUB_NAME = np.frombuffer(b"trades_submitted_total", dtype=np.uint8)
+else:  # pragma: no cover
+    _scan_metrics_jit = None
+
+
+def _parse_metrics(text: str | bytes) -> Tuple[int, int]:
+    """Return (hit, total) counters parsed from Prometheus exposition text.
+
+    A single regex scan over the whole page replaces per-line splitting, so
+    only matching samples allocate Python objects.  Pages of `JIT_MIN_BYTES`
+    or more are scanned by the Numba-compiled byte state machine instead;
+    raw response bytes go to it zero-copy, without a decode/encode round-trip.
+    Counts too large for its int64 accumulators fall back to the regex path.
+    """
+    if _scan_metrics_jit is not None and len(text) >= JIT_MIN_BYTES:
+        raw = text if isinstance(text, bytes) else text.encode()
+        buf = np.frombuffer(raw, dtype=np.uint8)
+        hit, total, exact = _scan_metrics_jit(buf, _HIT_NAME, _SUB_NAME)
+        if exact:
+            return int(hit), int(total)
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", "replace")
     hit = total = 0
-    for line in text.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
+    for name, value in _METRIC_RE.findall(text):
+        try:
+            count = int(float(value))
+        except (ValueError, OverflowError):
             continue
-        if line.startswith("trade_hit_total"):
-            try:
-                hit += int(float(line.split()[1]))
-            except (IndexError, ValueError):
-                pass
-        elif line.startswith("trades_submitted_total"):
-            try:
-                total += int(float(line.split()[1]))
-            except (IndexError, ValueError):
-                pass
+        if name == "trade_hit_total":
+            hit += count
+        else:
+            total += count
     return hit, total
 
 
@@ -55,17 +216,25 @@ def _suggest_ticket_size(baseline: int, hit: int, total: int) -> int:
 # Artifact production --------------------------------------------------------
 # ---------------------------------------------------------------------------
 
-def produce() -> Tuple[str, str]:
-    """Return YAML artifact adjusting ticket size based on hit-rate."""
+async def _fetch_metrics() -> bytes:
+    """Scrape Prometheus without blocking the event loop; b"" on any failure.
+
+    Returns the raw body: `_parse_metrics` decodes only when it has to.
+    """
     if httpx is None:
-        metrics_txt = ""
-    else:
-        try:
-            resp = httpx.get(PROMETHEUS_URL, timeout=5)
+        return b""
+    try:
+        async with httpx.AsyncClient(http2=HTTP2, timeout=5) as client:
+            resp = await client.get(PROMETHEUS_URL)
             resp.raise_for_status()
-            metrics_txt = resp.text
-        except Exception:  # pragma: no cover – network error ignored
-            metrics_txt = ""
+            return resp.content
+    except Exception:  # pragma: no cover – network error ignored
+        return b""
+
+
+def produce() -> Tuple[str, bytes]:
+    """Return UTF-8 YAML artifact adjusting ticket size based on hit-rate."""
+    metrics_txt = asyncio.run(_fetch_metrics())
 
     hit, total = _parse_metrics(metrics_txt)
     new_size = _suggest_ticket_size(BASELINE_TICKET_SIZE, hit, total)
@@ -74,7 +243,7 @@ def produce() -> Tuple[str, str]:
         "ticket_size": new_size,
         "baseline_ticket_size": BASELINE_TICKET_SIZE,
     }
-    return "risk_patch.yaml", yaml.safe_dump(data, sort_keys=False)
+    return "risk_patch.yaml", yaml.dump(data, Dumper=SafeDumper, sort_keys=False, encoding="utf-8")
 
 # ---------------------------------------------------------------------------
 # CLI -----------------------------------------------------------------------
@@ -82,11 +251,10 @@ def produce() -> Tuple[str, str]:
 
 def main() -> None:  # pragma: no cover
     name, content = produce()
-    artifacts_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "artifacts"))
-    os.makedirs(artifacts_dir, exist_ok=True)
-    with open(os.path.join(artifacts_dir, name), "w", encoding="utf-8") as fh:
+    ARTIFACTS.mkdir(parents=True, exist_ok=True)
+    with open(ARTIFACTS / name, "wb") as fh:
         fh.write(content)
-    print(content)
+    print(content.decode())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
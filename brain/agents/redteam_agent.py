@@ -1,12 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import json
 import os
+import random
+import time
+from collections import OrderedDict
+from pathlib import Path
 from typing import Any, Dict, Tuple
 
 import openai
+import orjson
 import yaml  # type: ignore
 
+try:
+    from yaml import CSafeDumper as SafeDumper  # type: ignore
+except ImportError:  # pragma: no cover – PyYAML built without libyaml
+    from yaml import SafeDumper  # type: ignore
+
+from brain.agents import _batch
+
+try:
+    import redis  # type: ignore
+except ImportError:  # pragma: no cover – shared cache tier is optional
+    redis = None  # type: ignore
+
 # ---------------------------------------------------------------------------
 # Core logic ----------------------------------------------------------------
 # ---------------------------------------------------------------------------
@@ -14,50 +34,424 @@ import yaml  # type: ignore
 
 USE_LLM = os.getenv("USE_LLM", "false").lower() == "true"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+ARTIFACTS = Path(__file__).resolve().parents[2] / "artifacts"
+REDIS_URL = os.getenv("REDIS_URL")
+LLM_MODEL = "gpt-4"
+LLM_TEMPERATURE = 0.2
+LLM_CACHE_TTL_SEC = 4 * 60 * 60  # filters rarely change between 6 h runs
+# Batch API results are cached longer: they must outlive the wait for the
+# next 6 h run after the morning collection.
+BATCH_CACHE_TTL_SEC = 30 * 60 * 60
+BATCH_STATE = ARTIFACTS / "redteam_batch.json"  # id of the pending batch
+# Per-attempt bound plus jittered exponential backoff between attempts, so a
+# stalled TLS handshake cannot hold the 6 h run (or an executor thread).
+LLM_TIMEOUT_SEC = 10.0
+LLM_MAX_ATTEMPTS = 3
+LLM_BACKOFF_MIN_SEC = 1.0
+LLM_BACKOFF_MAX_SEC = 8.0
 llm_call_total = 0  # Prometheus counter placeholder
+llm_timeout_total = 0  # Prometheus counter placeholder
+llm_cache_hits_total = 0  # Prometheus counter placeholder
+llm_cache_misses_total = 0  # Prometheus counter placeholder
 
 
-def suggest_guard_patches(current_filters: Dict[str, Any]) -> Dict[str, Any]:
-    """Produce patch suggestions for guard-rules, optionally using LLM."""
-    global llm_call_total
-    if USE_LLM and OPENAI_API_KEY:
+def _canonicalize(value: Any) -> Any:
+    """Normalise filters so cosmetic differences map to one prompt/cache key.
+
+    Dict keys are sorted and None entries dropped, tuples become lists and
+    floats are rounded to 6 decimals.
+    """
+    if isinstance(value, dict):
+        return {str(k): _canonicalize(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0])) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(v) for v in value]
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+
+def _cache_key(messages: list[dict[str, str]]) -> str:
+    """Process-independent key (builtin hash() is salted per interpreter)."""
+    blob = json.dumps(
+        {"model": LLM_MODEL, "messages": messages, "temperature": LLM_TEMPERATURE},
+        sort_keys=True,
+    )
+    return "llm_cache:redteam:" + hashlib.sha256(blob.encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=1)
+def _redis_client():
+    if redis is None or not REDIS_URL:
+        return None
+    try:
+        return redis.Redis.from_url(REDIS_URL)
+    except Exception:  # pragma: no cover – cache tier unavailable
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _client():
+    """Shared OpenAI client so TLS/connection pool setup is paid once.
+
+    SDK-level retries are off; `_create_with_retry` owns the retry policy.
+    """
+    return openai.OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+
+
+@functools.lru_cache(maxsize=1)
+def _async_client():
+    """Async counterpart of `_client`; `_acreate_with_retry` owns retries."""
+    return openai.AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+
+
+# ---------------------------------------------------------------------------
+# Bounded LLM calls ---------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+# asyncio.TimeoutError (raised by wait_for) is only TimeoutError from Python 3.11.
+_TIMEOUT_ERRORS: tuple[type[BaseException], ...] = (openai.APITimeoutError, asyncio.TimeoutError, TimeoutError)
+_RETRYABLE_ERRORS: tuple[type[BaseException], ...] = _TIMEOUT_ERRORS + (openai.APIConnectionError,)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Jittered exponential backoff: uniform in [min, min(max, min * 2**attempt)]."""
+    return random.uniform(LLM_BACKOFF_MIN_SEC, min(LLM_BACKOFF_MAX_SEC, LLM_BACKOFF_MIN_SEC * 2**attempt))
+
+
+def _note_failure(exc: BaseException) -> None:
+    global llm_timeout_total
+    if isinstance(exc, _TIMEOUT_ERRORS):
+        llm_timeout_total += 1  # Increment Prometheus counter
+
+
+def _create_with_retry(**kwargs: Any):
+    """`chat.completions.create` bounded by `LLM_TIMEOUT_SEC` per attempt."""
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        try:
+            return _client().chat.completions.create(timeout=LLM_TIMEOUT_SEC, **kwargs)
+        except _RETRYABLE_ERRORS as exc:
+            _note_failure(exc)
+            if attempt + 1 == LLM_MAX_ATTEMPTS:
+                raise
+            time.sleep(_backoff_delay(attempt))
+
+
+async def _acreate_with_retry(**kwargs: Any):
+    """Async twin of `_create_with_retry` on the shared AsyncOpenAI client."""
+    for attempt in range(LLM_MAX_ATTEMPTS):
         try:
-            openai.api_key = OPENAI_API_KEY
-            prompt = f"Suggest YAML patch heuristics for these filters: {json.dumps(current_filters)}. Return a JSON object with a 'patches' key containing a list of patch dicts."
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-                max_tokens=256,
+            return await asyncio.wait_for(
+                _async_client().chat.completions.create(timeout=LLM_TIMEOUT_SEC, **kwargs), LLM_TIMEOUT_SEC
             )
-            llm_call_total += 1  # Increment Prometheus counter
-            result = json.loads(response.choices[0].message.content)
-            if "patches" in result:
-                return result
-        except Exception:
-            pass  # Fallback to heuristic below if LLM fails
+        except _RETRYABLE_ERRORS as exc:
+            _note_failure(exc)
+            if attempt + 1 == LLM_MAX_ATTEMPTS:
+                raise
+            await asyncio.sleep(_backoff_delay(attempt))
+
+
+# In-process tier of the reply cache (LRU order); Redis is the shared tier.
+LOCAL_CACHE_SIZE = 256
+_local_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _cache_get(key: str) -> str | None:
+    global llm_cache_hits_total, llm_cache_misses_total
+    if key in _local_cache:
+        _local_cache.move_to_end(key)
+        llm_cache_hits_total += 1
+        return _local_cache[key]
+    cli = _redis_client()
+    if cli is not None:
+        try:
+            cached = cli.get(key)
+        except Exception:  # pragma: no cover – treat as miss
+            cached = None
+        if cached is not None:
+            content = cached.decode() if isinstance(cached, bytes) else cached
+            _remember(key, content)
+            llm_cache_hits_total += 1
+            return content
+    llm_cache_misses_total += 1
+    return None
+
+
+def _remember(key: str, content: str) -> None:
+    _local_cache[key] = content
+    _local_cache.move_to_end(key)
+    while len(_local_cache) > LOCAL_CACHE_SIZE:
+        _local_cache.popitem(last=False)
+
+
+def _cache_put(key: str, content: str, ttl: int = LLM_CACHE_TTL_SEC) -> None:
+    _remember(key, content)
+    cli = _redis_client()
+    if cli is not None:
+        try:
+            cli.setex(key, ttl, content)
+        except Exception:  # pragma: no cover – cache write is best-effort
+            pass
+
+
+def _canonical_json(current_filters: Dict[str, Any]) -> str:
+    return json.dumps(_canonicalize(current_filters), sort_keys=True, separators=(",", ":"))
+
+
+def _build_prompt(current_filters: Dict[str, Any]) -> str:
+    """Single-filter prompt; its hash is the per-filter cache key."""
+    return f"Suggest YAML patch heuristics for these filters: {_canonical_json(current_filters)}. Return a JSON object with a 'patches' key containing a list of patch dicts."
+
+
+def _build_batch_prompt(filters_list: list[Dict[str, Any]]) -> str:
+    numbered = "\n".join(f"{i}: {_canonical_json(f)}" for i, f in enumerate(filters_list))
+    return (
+        f"Suggest YAML patch heuristics for each of the {len(filters_list)} filter dicts below.\n"
+        f"{numbered}\n"
+        'Return a JSON object {"results": [{"index": i, "patches": [...]}, ...]} with one entry '
+        "per filter dict, where patches is a list of patch dicts."
+    )
+
+
+def _parse_reply(content: str) -> Dict[str, Any]:
+    """Decode an LLM reply; raise unless it carries a 'patches' key."""
+    result = orjson.loads(content)
+    if "patches" not in result:
+        raise ValueError("LLM reply lacks 'patches'")
+    return result
+
 
+def _demux_batch_reply(content: str, n: int) -> list[Dict[str, Any] | None]:
+    """Split a batched reply by index; entries the LLM omitted stay None."""
+    out: list[Dict[str, Any] | None] = [None] * n
+    for entry in orjson.loads(content).get("results", []):
+        idx = entry.get("index")
+        if isinstance(idx, int) and 0 <= idx < n and isinstance(entry.get("patches"), list):
+            out[idx] = {"patches": entry["patches"]}
+    return out
+
+
+@functools.lru_cache(maxsize=1024)
+def _max_position_patches(mp: int | float) -> tuple[dict[str, Any], ...]:
     # Heuristic rule: adjust max_position by +10 % to widen risk buffer
+    new_val = int(mp * 1.1)
+    if new_val == mp:
+        return ()
+    return ({"path": "/max_position", "operation": "replace", "value": new_val},)
+
+
+def _heuristic_patches(current_filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Rule-based patches, memoised on `max_position` (the only input read).
+
+    Cached entries are copied so callers may mutate the returned patches.
+    """
     patches: list[dict[str, Any]] = []
     if (mp := current_filters.get("max_position")) and isinstance(mp, (int, float)):
-        new_val = int(mp * 1.1)
-        if new_val != mp:
-            patches.append({"path": "/max_position", "operation": "replace", "value": new_val})
+        patches = [dict(p) for p in _max_position_patches(mp)]
 
     return {"patches": patches}
 
 
+def _lookup_batch(filters_list: list[Dict[str, Any]]) -> tuple[list[str], list[Dict[str, Any] | None]]:
+    """Per-filter cache keys plus cached results (None where missing)."""
+    keys = [_cache_key([{"role": "user", "content": _build_prompt(f)}]) for f in filters_list]
+    results: list[Dict[str, Any] | None] = []
+    for key in keys:
+        content = _cache_get(key)
+        try:
+            results.append(_parse_reply(content) if content is not None else None)
+        except ValueError:
+            results.append(None)
+    return keys, results
+
+
+def _merge_batch(
+    keys: list[str],
+    results: list[Dict[str, Any] | None],
+    missing: list[int],
+    content: str,
+) -> None:
+    """Fill `results[missing]` from a batched reply and cache each entry."""
+    for i, res in zip(missing, _demux_batch_reply(content, len(missing))):
+        if res is not None:
+            results[i] = res
+            _cache_put(keys[i], json.dumps(res))
+
+
+def suggest_guard_patches_batch(filters_list: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """Patch suggestions for several filter sets with at most one LLM request.
+
+    Cached filter sets are answered locally; the rest share one chat completion
+    whose reply is demultiplexed by index.  Anything the LLM does not cover
+    falls back to the heuristic.
+    """
+    global llm_call_total
+    results: list[Dict[str, Any] | None] = [None] * len(filters_list)
+    if USE_LLM and OPENAI_API_KEY and filters_list:
+        try:
+            keys, results = _lookup_batch(filters_list)
+            missing = [i for i, r in enumerate(results) if r is None]
+            if missing:
+                response = _create_with_retry(
+                    model=LLM_MODEL,
+                    messages=[{"role": "user", "content": _build_batch_prompt([filters_list[i] for i in missing])}],
+                    temperature=LLM_TEMPERATURE,
+                    max_tokens=256 * len(missing),
+                )
+                llm_call_total += 1  # Increment Prometheus counter
+                _merge_batch(keys, results, missing, response.choices[0].message.content)
+        except Exception:
+            pass  # Fallback to heuristic below if LLM fails
+
+    return [r if r is not None else _heuristic_patches(f) for r, f in zip(results, filters_list)]
+
+
+async def suggest_guard_patches_batch_async(filters_list: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """Awaitable `suggest_guard_patches_batch` on the AsyncOpenAI client.
+
+    Lets the manager keep several agents' LLM requests in flight on its event
+    loop instead of parking an executor thread per request.  The reply-cache
+    lookup and store use the blocking Redis client, so they run in a worker
+    thread to keep a slow Redis from stalling the loop.
+    """
+    global llm_call_total
+    results: list[Dict[str, Any] | None] = [None] * len(filters_list)
+    if USE_LLM and OPENAI_API_KEY and filters_list:
+        try:
+            keys, results = await asyncio.to_thread(_lookup_batch, filters_list)
+            missing = [i for i, r in enumerate(results) if r is None]
+            if missing:
+                response = await _acreate_with_retry(
+                    model=LLM_MODEL,
+                    messages=[{"role": "user", "content": _build_batch_prompt([filters_list[i] for i in missing])}],
+                    temperature=LLM_TEMPERATURE,
+                    max_tokens=256 * len(missing),
+                )
+                llm_call_total += 1  # Increment Prometheus counter
+                await asyncio.to_thread(_merge_batch, keys, results, missing, response.choices[0].message.content)
+        except Exception:
+            pass  # Fallback to heuristic below if LLM fails
+
+    return [r if r is not None else _heuristic_patches(f) for r, f in zip(results, filters_list)]
+
+
+def suggest_guard_patches(current_filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Produce patch suggestions for guard-rules, optionally using LLM.
+
+    LLM replies are cached per filter set (in-process LRU, then Redis when
+    `REDIS_URL` is set) so unchanged filters skip the OpenAI round-trip.
+    """
+    return suggest_guard_patches_batch([current_filters])[0]
+
+
+async def suggest_guard_patches_async(current_filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Async twin of `suggest_guard_patches`."""
+    return (await suggest_guard_patches_batch_async([current_filters]))[0]
+
+
+# ---------------------------------------------------------------------------
+# Batch API (off-peak, half-price) -------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def submit_guard_patch_batch(filters_list: list[Dict[str, Any]]) -> str | None:
+    """Queue one Batch API request per filter set; return the batch id.
+
+    Each request uses the filter's cache key as `custom_id`, so collected
+    replies land in the same cache the synchronous path reads.  No-op (None)
+    unless the LLM is enabled and Redis is configured: the in-process cache
+    dies with the cron process, so replies need the shared tier to be read.
+    A still-running previous batch is never orphaned; it is collected first,
+    and the submit is skipped while it is pending.
+    """
+    if not (USE_LLM and OPENAI_API_KEY) or not filters_list or _redis_client() is None:
+        return None
+    if BATCH_STATE.exists():
+        try:
+            collect_guard_patch_batch()
+        except RuntimeError:
+            pass  # previous batch failed/expired and was dropped; queue afresh
+        if BATCH_STATE.exists():
+            return None
+    requests: dict[str, dict[str, Any]] = {}
+    for f in filters_list:
+        messages = [{"role": "user", "content": _build_prompt(f)}]
+        requests[_cache_key(messages)] = {
+            "model": LLM_MODEL,
+            "messages": messages,
+            "temperature": LLM_TEMPERATURE,
+            "max_tokens": 256,
+        }
+    batch_id = _batch.submit(list(requests.items()), metadata={"agent": "redteam"})
+    ARTIFACTS.mkdir(parents=True, exist_ok=True)
+    BATCH_STATE.write_text(json.dumps({"batch_id": batch_id}), encoding="utf-8")
+    return batch_id
+
+
+def collect_guard_patch_batch() -> int | None:
+    """Load a finished batch's replies into the Redis reply cache.
+
+    Returns the number of replies stored, or None when no batch is pending,
+    the pending one is still running, or Redis is not configured.  The batch
+    id is only forgotten once every reply is in Redis; a failed write raises
+    and leaves it for the next collect.
+    """
+    cli = _redis_client()
+    if cli is None:
+        return None
+    try:
+        batch_id = json.loads(BATCH_STATE.read_text(encoding="utf-8"))["batch_id"]
+    except OSError:
+        return None
+    except (ValueError, KeyError):
+        BATCH_STATE.unlink(missing_ok=True)  # unreadable id: nothing to collect
+        return None
+    try:
+        replies = _batch.collect(batch_id)
+    except RuntimeError:
+        BATCH_STATE.unlink(missing_ok=True)  # failed/expired: drop and resubmit later
+        raise
+    if replies is None:
+        return None
+    valid: dict[str, str] = {}
+    for key, content in replies.items():
+        try:
+            _parse_reply(content)
+        except ValueError:
+            continue
+        valid[key] = content
+    pipe = cli.pipeline()
+    for key, content in valid.items():
+        pipe.setex(key, BATCH_CACHE_TTL_SEC, content)
+    pipe.execute()
+    for key, content in valid.items():
+        _remember(key, content)
+    BATCH_STATE.unlink(missing_ok=True)
+    return len(valid)
+
+
 # ---------------------------------------------------------------------------
 # Artifact production -------------------------------------------------------
 # ---------------------------------------------------------------------------
 
 
-def produce(current_filters: Dict[str, Any] | None = None) -> Tuple[str, str]:
-    """Return YAML artifact for manager."""
-    current_filters = current_filters or {}
+def produce(current_filters: Dict[str, Any] | None = None) -> Tuple[str, bytes]:
+    """Return UTF-8 YAML artifact for manager.
+
+    Without explicit filters the set comes from `load_filters()`, the same
+    source the nightly Batch API submit uses, so its cached replies match.
+    """
+    if current_filters is None:
+        current_filters = load_filters()
     patch_dict = suggest_guard_patches(current_filters)
-    yaml_str = yaml.safe_dump(patch_dict, sort_keys=False)
-    return "guard_patches.yaml", yaml_str
+    return "guard_patches.yaml", yaml.dump(patch_dict, Dumper=SafeDumper, sort_keys=False, encoding="utf-8")
+
+
+async def produce_async(current_filters: Dict[str, Any] | None = None) -> Tuple[str, bytes]:
+    """Async twin of `produce`, awaited directly by the manager."""
+    if current_filters is None:
+        current_filters = load_filters()
+    patch_dict = await suggest_guard_patches_async(current_filters)
+    return "guard_patches.yaml", yaml.dump(patch_dict, Dumper=SafeDumper, sort_keys=False, encoding="utf-8")
 
 
 # ---------------------------------------------------------------------------
@@ -65,22 +459,23 @@ def produce(current_filters: Dict[str, Any] | None = None) -> Tuple[str, str]:
 # ---------------------------------------------------------------------------
 
 
-def main() -> None:  # pragma: no cover
+def load_filters() -> Dict[str, Any]:
+    """Current filter set from `FILTERS_JSON`, or {} if unset/missing."""
     filters_path = os.getenv("FILTERS_JSON")  # optionally read current filter set
     if filters_path and os.path.exists(filters_path):
         with open(filters_path, "r", encoding="utf-8") as fh:
-            current = json.load(fh)
-    else:
-        current = {}
+            return json.load(fh)
+    return {}
+
 
-    name, content = produce(current)
+def main() -> None:  # pragma: no cover
+    name, content = produce(load_filters())
 
-    artifacts_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "artifacts"))
-    os.makedirs(artifacts_dir, exist_ok=True)
-    with open(os.path.join(artifacts_dir, name), "w", encoding="utf-8") as fh:
+    ARTIFACTS.mkdir(parents=True, exist_ok=True)
+    with open(ARTIFACTS / name, "wb") as fh:
         fh.write(content)
 
-    print(content)
+    print(content.decode())
 
 
 if __name__ == "__main__":
@@ -1,31 +1,66 @@
-import subprocess
 import sys
+import traceback
 from datetime import datetime, timezone
 
 """Nightly retrain cron entry.
 
 Schedule: 03:30 UTC every day (see Ops infra nomad/cron).  The scheduler shell
 invokes `python -m brain.cron_retrain` inside the Brain container.  We run the
-heuristic agent and forward its JSON manifest to STDOUT, letting upstream
-systems persist the artefact.
+heuristic agent in-process (no second interpreter start-up) and let it write
+its JSON manifest to STDOUT, letting upstream systems persist the artefact.
+
+The red-team LLM workload has no latency requirement either, so the nightly
+run also queues it on the OpenAI Batch API (half price, separate rate
+limits).  A morning cron runs `python -m brain.cron_retrain collect` to load
+the finished replies into the red-team reply cache.
 
 Guardrails (AGENTS_GUIDE):
 • Must terminate < 10 min (dataset ≤ 1 M rows, LightGBM training ≪ cap).
 • Exit code non-zero on failure so cron monitors can alert.
 """
 
-CMD = [sys.executable, "-m", "brain.agents.heuristic_agent"]
+
+def submit_llm_batch() -> None:
+    """Queue tonight's red-team prompts; failures never fail the retrain."""
+    try:
+        from brain.agents import redteam_agent
+
+        batch_id = redteam_agent.submit_guard_patch_batch([redteam_agent.load_filters()])
+    except Exception as e:  # pragma: no cover – network / API errors
+        print(f"redteam batch submit failed: {e}", file=sys.stderr)
+        return
+    if batch_id:
+        print(f"redteam batch submitted id={batch_id}")
+
+
+def collect_llm_batch() -> None:
+    """Store finished batch replies; any failure exits non-zero for cron alerts."""
+    try:
+        from brain.agents import redteam_agent
+
+        stored = redteam_agent.collect_guard_patch_batch()
+    except Exception:  # Redis write, OpenAI API or network errors
+        traceback.print_exc()
+        sys.exit(1)
+    if stored is None:
+        print("redteam batch: nothing ready")
+    else:
+        print(f"redteam batch collected replies={stored}")
 
 
 def main() -> None:
+    if sys.argv[1:2] == ["collect"]:
+        collect_llm_batch()
+        return
     start = datetime.now(timezone.utc)
     try:
-        result = subprocess.run(CMD, check=True, capture_output=True, text=True)
-        print(result.stdout)
-    except subprocess.CalledProcessError as e:
-        print(e.stdout, file=sys.stderr)
-        print(e.stderr, file=sys.stderr)
-        sys.exit(e.returncode)
+        from brain.agents import heuristic_agent
+
+        heuristic_agent.main()
+        submit_llm_batch()
+    except Exception:
+        traceback.print_exc()
+        sys.exit(1)
     finally:
         duration = (datetime.now(timezone.utc) - start).total_seconds()
         print(f"retrain duration_sec={duration:.1f}")
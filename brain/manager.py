@@ -1,17 +1,38 @@
 """Stub manager that will later schedule sub-agents."""
 import asyncio
+import functools
+import heapq
 import importlib
-import json
+import inspect
 import os
 import time
 import hashlib
 from typing import Callable, Dict, Tuple, Any
 
+import orjson
+
 try:
     import redis  # type: ignore
 except ImportError:  # pragma: no cover – runtime env may inject
     redis = None  # type: ignore
 
+# Artifact digest is only an identity tag for subscribers; use the fastest
+# available.  The payload schema is fixed: "digest" holds the hex digest and
+# "digest_algo" names the algorithm actually used.
+try:
+    import blake3  # type: ignore
+
+    DIGEST_ALGO = "blake3"
+
+    def _digest(data: bytes) -> str:
+        return blake3.blake3(data).hexdigest()
+
+except ImportError:  # pragma: no cover – fall back to libb2 via hashlib
+    DIGEST_ALGO = "blake2b"
+
+    def _digest(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=32).hexdigest()
+
 # Hard-fail early if Redis client missing to avoid silent degradation
 if redis is None:
     raise SystemExit("Redis Python package missing – abort")
@@ -20,7 +41,7 @@ if redis is None:
 # Task registry --------------------------------------------------------------
 # ---------------------------------------------------------------------------
 
-AgentProduce = Callable[[], Tuple[str, str]]  # returns (artifact_name, content)
+AgentProduce = Callable[[], Tuple[str, bytes]]  # returns (artifact_name, UTF-8 content)
 
 AGENTS: Dict[str, Dict[str, Any]] = {
     "narrative": {
@@ -30,6 +51,7 @@ AGENTS: Dict[str, Dict[str, Any]] = {
     "redteam": {
         "interval": 6 * 60 * 60,  # 6 h
         "module": "brain.agents.redteam_agent",
+        "attr": "produce_async",  # awaited on the loop, no executor thread
     },
     "performance_coach": {
         "interval": 15 * 60,  # 15 min
@@ -50,45 +72,95 @@ REDIS_URL = os.environ["REDIS_URL"]
 # ---------------------------------------------------------------------------
 
 
+_PRODUCER_CACHE: Dict[Tuple[str, str], AgentProduce] = {}
+
+
 def _import_producer(module_path: str, attr: str | None = None) -> AgentProduce:
     """Import module and retrieve produce callable.
 
-    Attr defaults to `produce`; retained parameter for fwd-compat.
+    Attr defaults to `produce`; retained parameter for fwd-compat.  Resolved
+    callables are memoised so later ticks skip the import machinery.
     """
-    mod = importlib.import_module(module_path)
-    return getattr(mod, attr or "produce")  # type: ignore[return-value]
+    key = (module_path, attr or "produce")
+    produce = _PRODUCER_CACHE.get(key)
+    if produce is None:
+        mod = importlib.import_module(module_path)
+        produce = _PRODUCER_CACHE[key] = getattr(mod, key[1])
+    return produce  # type: ignore[return-value]
 
 
 async def _run_once(agent_name: str, redis_cli) -> None:  # pragma: no cover – scheduling tests separate
     cfg = AGENTS[agent_name]
-    produce: AgentProduce = _import_producer(cfg["module"], None)  # type: ignore[arg-type]
+    produce: AgentProduce = _import_producer(cfg["module"], cfg.get("attr"))  # type: ignore[arg-type]
 
-    # The produce function may be blocking → run in thread pool
-    loop = asyncio.get_running_loop()
-    result = await loop.run_in_executor(None, produce)
+    if inspect.iscoroutinefunction(produce):
+        result = await produce()
+    else:
+        # The produce function may be blocking → run in thread pool
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, produce)
 
     # If agent prints to stdout but returns None (e.g., heuristic_agent.main)
     # we skip Redis publishing.  Future work: capture stdout.
     if result is None:
         return
 
-    artifact_name, content = result
-
-    sha = hashlib.sha256(content.encode()).hexdigest()
-    payload = {
-        "agent": agent_name,
-        "artifact": artifact_name,
-        "sha256": sha,
-        "content": content,
-    }
+    # Multi-artifact agents (narrative) return a list of pairs.
+    artifacts = result if isinstance(result, list) else [result]
+    for artifact_name, content in artifacts:
+        # Producers hand over UTF-8 bytes: hashed as-is, decoded once for JSON.
+        raw = content.encode() if isinstance(content, str) else content
+        payload = {
+            "agent": agent_name,
+            "artifact": artifact_name,
+            "digest": _digest(raw),
+            "digest_algo": DIGEST_ALGO,
+            "content": raw.decode(),
+        }
+
+        if redis_cli is not None:
+            redis_cli.publish("config_updates", orjson.dumps(payload))
+
+
+def _discard_task(running: Dict[str, asyncio.Task], name: str, task: asyncio.Task) -> None:
+    if running.get(name) is task:
+        del running[name]
+    if not task.cancelled():
+        task.exception()  # agent failures are swallowed, as with gather(return_exceptions=True)
+
+
+async def _schedule(
+    redis_cli,
+    running: Dict[str, asyncio.Task],
+    clock: Callable[[], float] = time.time,
+    sleep: Callable[[float], Any] = asyncio.sleep,
+) -> None:
+    """Run agents forever, earliest deadline first.
+
+    Sleeps exactly until the next agent is due instead of waking every 30 s
+    to check all intervals.  `running` holds the latest run per agent: a
+    strong ref so tasks aren't GC'd mid-run, and the guard that keeps a slow
+    agent from overlapping its own previous run.  `clock`/`sleep` are
+    injectable for tests.
+    """
+    heap = [(0.0, name) for name in AGENTS]
+    heapq.heapify(heap)
 
-    if redis_cli is not None:
-        redis_cli.publish("config_updates", json.dumps(payload))
+    while True:
+        ts, name = heap[0]
+        delay = ts - clock()
+        if delay > 0:
+            await sleep(delay)
+        now = clock()
+        heapq.heapreplace(heap, (now + float(AGENTS[name].get("interval", 0)), name))
+        if name in running:
+            continue  # previous run still in flight; try again next interval
+        task = asyncio.create_task(_run_once(name, redis_cli))
+        running[name] = task
+        task.add_done_callback(functools.partial(_discard_task, running, name))
 
 
 async def main() -> None:  # pragma: no cover
-    last_run: Dict[str, float] = {k: 0.0 for k in AGENTS}
-
     redis_cli = None
     if redis is not None:
         try:
@@ -96,18 +168,7 @@ async def main() -> None:  # pragma: no cover
         except Exception:
             redis_cli = None
 
-    while True:
-        now = time.time()
-        tasks = []
-        for name, cfg in AGENTS.items():
-            interval = float(cfg.get("interval", 0))
-            if now - last_run[name] >= interval:
-                tasks.append(_run_once(name, redis_cli))
-                last_run[name] = now
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-        await asyncio.sleep(30)
-
+    await _schedule(redis_cli, {})
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -4,41 +4,81 @@ Crypto vs Meme Coin Agent Comparison
 Shows how the system handles traditional crypto assets vs meme coins differently.
 """
 
-import requests
+import asyncio
+import httpx
 from datetime import datetime
 
-def test_traditional_crypto():
-    """Test with traditional crypto assets"""
+JUPITER_API = "https://quote-api.jup.ag/v6"
+USDC_MINT = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'
+
+# Traditional crypto tokens
+TRADITIONAL_TOKENS = [
+    {
+        'name': 'Solana',
+        'mint': 'So11111111111111111111111111111111111112',
+        'symbol': 'SOL'
+    },
+    {
+        'name': 'USDC',
+        'mint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',
+        'symbol': 'USDC'
+    }
+]
+
+# Meme tokens
+MEME_TOKENS = [
+    {
+        'name': 'BONK',
+        'mint': 'DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263',
+        'symbol': 'BONK'
+    },
+    {
+        'name': 'WIF (dogwifhat)',
+        'mint': 'EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm',
+        'symbol': 'WIF'
+    }
+]
+
+
+def _traditional_params(token):
+    return {
+        'inputMint': token['mint'],
+        'outputMint': USDC_MINT,
+        'amount': '1000000000',  # 1 SOL
+        'slippageBps': '50'
+    }
+
+
+def _meme_params(token):
+    return {
+        'inputMint': token['mint'],
+        'outputMint': USDC_MINT,
+        'amount': '1000000',  # 1M tokens
+        'slippageBps': '100'  # Higher slippage for memes
+    }
+
+
+async def fetch_quotes(param_sets):
+    """Fetch all Jupiter quotes concurrently over one pooled client.
+
+    Returns responses (or the exception raised) in the order of `param_sets`.
+    """
+    async with httpx.AsyncClient(timeout=10) as client:
+        return await asyncio.gather(
+            *(client.get(f"{JUPITER_API}/quote", params=params) for params in param_sets),
+            return_exceptions=True,
+        )
+
+
+def report_traditional_crypto(quotes):
+    """Report fetched quotes for traditional crypto assets"""
     print("💼 TRADITIONAL CRYPTO ANALYSIS")
     print("=" * 50)
     
-    jupiter_api = "https://quote-api.jup.ag/v6"
-    
-    # Traditional crypto tokens
-    traditional_tokens = [
-        {
-            'name': 'Solana',
-            'mint': 'So11111111111111111111111111111111111112',
-            'symbol': 'SOL'
-        },
-        {
-            'name': 'USDC',
-            'mint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',
-            'symbol': 'USDC'
-        }
-    ]
-    
-    for token in traditional_tokens[:1]:  # Just test SOL
+    for token, response in quotes:
         try:
-            url = f"{jupiter_api}/quote"
-            params = {
-                'inputMint': token['mint'],
-                'outputMint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',  # USDC
-                'amount': '1000000000',  # 1 SOL
-                'slippageBps': '50'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            if isinstance(response, Exception):
+                raise response
             
             if response.status_code == 200:
                 data = response.json()
@@ -91,38 +131,15 @@ def analyze_traditional_crypto(symbol, price, price_impact):
     print(f"   ⚠️  Risk: {risk_level}")
     print("   🎨 Strategy: Long-term, fundamental-based")
 
-def test_meme_coins():
-    """Test with meme coins"""
+def report_meme_coins(quotes):
+    """Report fetched quotes for meme coins"""
     print("\n🎪 MEME COIN ANALYSIS")
     print("=" * 50)
     
-    jupiter_api = "https://quote-api.jup.ag/v6"
-    
-    # Meme tokens
-    meme_tokens = [
-        {
-            'name': 'BONK',
-            'mint': 'DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263',
-            'symbol': 'BONK'
-        },
-        {
-            'name': 'WIF (dogwifhat)',
-            'mint': 'EKpQGSJtjMFqKZ9KQanSqYXRcF8fBopzLHYxdM65zcjm',
-            'symbol': 'WIF'
-        }
-    ]
-    
-    for token in meme_tokens[:1]:  # Just test BONK
+    for token, response in quotes:
         try:
-            url = f"{jupiter_api}/quote"
-            params = {
-                'inputMint': token['mint'],
-                'outputMint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',  # USDC
-                'amount': '1000000',  # 1M tokens
-                'slippageBps': '100'  # Higher slippage for memes
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
+            if isinstance(response, Exception):
+                raise response
             
             if response.status_code == 200:
                 data = response.json()
@@ -189,11 +206,18 @@ def main():
     print("Comparing how agents handle different asset types")
     print()
     
-    # Test traditional crypto
-    test_traditional_crypto()
+    # Fetch every quote concurrently, then report each asset class
+    traditional = TRADITIONAL_TOKENS[:1]  # Just test SOL
+    memes = MEME_TOKENS[:1]  # Just test BONK
+    responses = asyncio.run(fetch_quotes(
+        [_traditional_params(t) for t in traditional] + [_meme_params(t) for t in memes]
+    ))
+    
+    # Report traditional crypto
+    report_traditional_crypto(list(zip(traditional, responses[:len(traditional)])))
     
-    # Test meme coins
-    test_meme_coins()
+    # Report meme coins
+    report_meme_coins(list(zip(memes, responses[len(traditional):])))
     
     # Summary comparison
     print("\n📋 AGENT STRATEGY COMPARISON")
@@ -5,69 +5,241 @@ Connects to real Twitter/X feeds and Solana data to validate agents in real-time
 """
 
 import asyncio
-import json
-import requests
+from collections import deque
+import httpx
+import orjson
 import websockets
 import os
-from datetime import datetime, timedelta
-import numpy as np
+import time
+from datetime import datetime
 from typing import List
 
+# numpy/pyarrow (~100 ms+ to import) are imported lazily by their only users.
+
 # Environment setup
 TWITTER_BEARER = os.getenv('TWITTER_BEARER')
 SOLANA_WSS_URL = os.getenv('SOLANA_WSS_URL', 'wss://api.devnet.solana.com')
 SOLANA_RPC_URL = os.getenv('SOLANA_RPC_URL', 'https://api.devnet.solana.com')
 JUPITER_API = os.getenv('JUPITER_API', 'https://quote-api.jup.ag/v6')
+WRITE_BATCH = 128  # records per background write
+SOLANA_EXPECTED_RATE = 50  # events/s, sizes the in-memory Solana window
+SOLANA_RING_MAX = 1 << 16  # window capacity ceiling (full history is on disk)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# Sentiment vocabulary, matched in one pass per tweet: Hyperscan's SIMD
+# DFA when installed, else pyahocorasick, else per-word substring checks.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+POSITIVE_WORDS = ('bullish', 'moon', 'pump', 'up', 'good', 'great', 'amazing')
+NEGATIVE_WORDS = ('bearish', 'dump', 'down', 'bad', 'crash', 'terrible')
+
+def _build_sentiment_automaton():
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for idx, word in enumerate(POSITIVE_WORDS + NEGATIVE_WORDS):
+        automaton.add_word(word, idx)
+    automaton.make_automaton()
+    return automaton
+
+_SENTIMENT_AUTOMATON = _build_sentiment_automaton()
+
+def _build_sentiment_db():
+    if hyperscan is None:
+        return None
+    words = POSITIVE_WORDS + NEGATIVE_WORDS
+    db = hyperscan.Database()
+    # SINGLEMATCH: each word reports once per scan, i.e. counts once per tweet
+    db.compile(
+        expressions=[w.encode() for w in words],
+        ids=list(range(len(words))),
+        elements=len(words),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(words),
+    )
+    return db
+
+_SENTIMENT_DB = _build_sentiment_db()
+
+def _write_ndjson(path: str, records) -> None:
+    """One compact JSON document per line (read back with pd.read_json(path, lines=True))"""
+    with open(path, 'wb') as f:
+        for rec in records:
+            f.write(orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE))
+
+async def _put_or_raise(queue: asyncio.Queue, item, consumer: asyncio.Task) -> None:
+    """`queue.put` that re-raises the consumer's error instead of blocking forever on a full queue"""
+    if consumer.done():
+        consumer.result()  # raises if the consumer failed
+        raise RuntimeError('queue consumer exited early')
+    put = asyncio.ensure_future(queue.put(item))
+    await asyncio.wait({put, consumer}, return_when=asyncio.FIRST_COMPLETED)
+    if not put.done():
+        put.cancel()
+        consumer.result()
+        raise RuntimeError('queue consumer exited early')
+
+# Jupiter quotes are kept as raw bodies; only `outAmount` is ever read, via
+# simdjson's on-demand pointer lookup when pysimdjson is installed.
+try:
+    import simdjson
+    _QUOTE_PARSER = simdjson.Parser()
+except ImportError:
+    simdjson = None
+
+def _quote_out_amount(raw: bytes):
+    """`outAmount` of a raw Jupiter quote body as float, or None if absent"""
+    try:
+        if simdjson is not None:
+            value = _QUOTE_PARSER.parse(raw).at_pointer('/outAmount')
+        else:
+            value = orjson.loads(raw)['outAmount']
+        return float(value)
+    except (KeyError, TypeError, AttributeError, ValueError):
+        return None
+
+def _jupiter_line(rec) -> bytes:
+    """NDJSON line for a quote record, splicing the raw body in unparsed"""
+    head = orjson.dumps({'timestamp': rec['timestamp'], 'token': rec['token']})
+    # Raw CR/LF can only be insignificant whitespace in valid JSON
+    body = rec['quote_raw'].replace(b'\r', b' ').replace(b'\n', b' ')
+    return head[:-1] + b',"quote":' + body + b'}\n'
 
 class LiveDataCollector:
     def __init__(self):
         self.twitter_data = []
-        self.solana_data = []
+        # Bounded window of the most recent Solana events as (epoch-ns receive
+        # time, raw unparsed payload) pairs; sized per collection run
+        self.solana_count = 0
+        self.solana_events: deque = deque()
         self.jupiter_data = []
         self.start_time = datetime.now()
+        self.run_stamp = self.start_time.strftime("%Y%m%d_%H%M%S")
+        self.solana_path = f'live_solana_data_{self.run_stamp}.parquet'
+        # Shared async pool: Twitter/Jupiter requests run concurrently over
+        # keep-alive (HTTP/2 multiplexed when h2 is installed) connections.
+        limits = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(http2=HTTP2, limits=limits, retries=3),
+            timeout=10.0,
+        )
+        # Twitter gets its own client so the bearer header is set once and
+        # every keyword search is a stream on the same api.twitter.com connection.
+        self.twitter_client = None
+        if TWITTER_BEARER:
+            self.twitter_client = httpx.AsyncClient(
+                base_url="https://api.twitter.com/2",
+                headers={'Authorization': f'Bearer {TWITTER_BEARER}'},
+                transport=httpx.AsyncHTTPTransport(http2=HTTP2, limits=limits, retries=3),
+                timeout=10.0,
+            )
+
+    async def aclose(self):
+        """Close the HTTP clients"""
+        await self.client.aclose()
+        if self.twitter_client is not None:
+            await self.twitter_client.aclose()
         
     async def collect_twitter_data(self, keywords: List[str] = None):
         """Collect live Twitter/X data for specified keywords"""
-        if not TWITTER_BEARER:
+        if self.twitter_client is None:
             print("❌ Twitter API key not configured")
             return
             
         keywords = keywords or ["solana", "SOL", "$SOL", "pump.fun", "memecoins"]
         
-        headers = {
-            'Authorization': f'Bearer {TWITTER_BEARER}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Twitter API v2 search endpoint
-        for keyword in keywords:
-            try:
-                url = "https://api.twitter.com/2/tweets/search/recent"
-                params = {
-                    'query': f'{keyword} -is:retweet lang:en',
-                    'tweet.fields': 'created_at,public_metrics,context_annotations',
-                    'max_results': 10
-                }
-                
-                response = requests.get(url, headers=headers, params=params)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'data' in data:
-                        self.twitter_data.extend(data['data'])
-                        print(f"✅ Collected {len(data['data'])} tweets for '{keyword}'")
-                else:
-                    print(f"❌ Twitter API error {response.status_code}: {response.text}")
-                    
-            except Exception as e:
-                print(f"❌ Twitter collection error: {e}")
+        # Twitter API v2 search endpoint, one request per keyword in flight at once
+        results = await asyncio.gather(*[self._fetch_tweets(keyword) for keyword in keywords])
+        for tweets in results:
+            self.twitter_data.extend(tweets)
                 
         return self.twitter_data
+
+    async def _fetch_tweets(self, keyword: str) -> list:
+        try:
+            params = {
+                'query': f'{keyword} -is:retweet lang:en',
+                'tweet.fields': 'created_at,public_metrics,context_annotations',
+                'max_results': 10
+            }
+            
+            response = await self.twitter_client.get("/tweets/search/recent", params=params)
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                if 'data' in data:
+                    print(f"✅ Collected {len(data['data'])} tweets for '{keyword}'")
+                    return data['data']
+            else:
+                print(f"❌ Twitter API error {response.status_code}: {response.text}")
+                
+        except Exception as e:
+            print(f"❌ Twitter collection error: {e}")
+        return []
     
+    async def _parquet_writer(self, queue: asyncio.Queue, path: str):
+        """Append queued (ts, payload) rows to `path` until a None sentinel arrives.
+
+        Up to WRITE_BATCH rows become one Arrow row group, written from an
+        executor thread so the event loop never blocks on disk.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Columnar layout of saved Solana events: receive time + raw JSON payload
+        schema = pa.schema([('ts', pa.int64()), ('payload', pa.large_binary())])
+        loop = asyncio.get_running_loop()
+        writer = None
+        try:
+            done = False
+            while not done:
+                batch = [await queue.get()]
+                while len(batch) < WRITE_BATCH and not queue.empty():
+                    batch.append(queue.get_nowait())
+                if batch[-1] is None:  # sentinel is always the last item queued
+                    done = True
+                    batch.pop()
+                if not batch:
+                    continue
+                ts, payloads = zip(*batch)
+                table = pa.Table.from_arrays(
+                    [pa.array(ts, pa.int64()), pa.array(payloads, pa.large_binary())],
+                    schema=schema,
+                )
+                if writer is None:
+                    writer = pq.ParquetWriter(path, schema)  # lazily: no empty file
+                await loop.run_in_executor(None, writer.write_table, table)
+        finally:
+            if writer is not None:
+                writer.close()
+
     async def collect_solana_websocket_data(self, duration_minutes: int = 5):
-        """Collect live Solana WebSocket data"""
+        """Collect live Solana WebSocket data, streaming it to Parquet as it arrives"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        # Fixed memory ceiling: every event is streamed to Parquet, so only the
+        # latest `capacity` stay in memory
+        capacity = min(SOLANA_RING_MAX, max(1, int(duration_minutes * 60 * SOLANA_EXPECTED_RATE)))
+        self.solana_events = deque(maxlen=capacity)
+        self.solana_count = 0
+        writer = asyncio.create_task(self._parquet_writer(queue, self.solana_path))
         try:
-            async with websockets.connect(SOLANA_WSS_URL) as websocket:
+            # Deep receive queue and no per-frame inflate keep the reader from
+            # stalling between awaits.
+            async with websockets.connect(
+                SOLANA_WSS_URL, max_queue=1024, compression=None, max_size=2**22
+            ) as websocket:
                 # Subscribe to account changes for popular tokens
                 subscription = {
                     "jsonrpc": "2.0",
@@ -79,88 +251,100 @@ class LiveDataCollector:
                     ]
                 }
                 
-                await websocket.send(json.dumps(subscription))
+                await websocket.send(orjson.dumps(subscription), text=True)
                 print(f"🔗 Connected to Solana WebSocket: {SOLANA_WSS_URL}")
                 
-                end_time = datetime.now() + timedelta(minutes=duration_minutes)
-                
-                while datetime.now() < end_time:
-                    try:
-                        message = await asyncio.wait_for(websocket.recv(), timeout=1.0)
-                        data = json.loads(message)
-                        self.solana_data.append({
-                            'timestamp': datetime.now().isoformat(),
-                            'data': data
-                        })
-                        
-                        if len(self.solana_data) % 10 == 0:
-                            print(f"📊 Collected {len(self.solana_data)} Solana events")
+                # One deadline for the whole window instead of a 1 s
+                # wait_for (and its timer) around every recv.
+                try:
+                    async with asyncio.timeout(duration_minutes * 60):
+                        while True:
+                            # decode=False hands text frames over as the raw UTF-8
+                            # bytes (no str round-trip); orjson parses bytes as-is.
+                            # Parsing is deferred: keep the raw payload next to an
+                            # int clock read; the writer task does the disk I/O
+                            payload = await websocket.recv(decode=False)
+                            event = (time.time_ns(), payload)
+                            self.solana_events.append(event)
+                            self.solana_count += 1
+                            try:
+                                queue.put_nowait(event)
+                            except asyncio.QueueFull:
+                                await _put_or_raise(queue, event, writer)  # writer is behind: back-pressure
+                            
+                            if self.solana_count % 10 == 0:
+                                print(f"📊 Collected {self.solana_count} Solana events")
                             
-                    except asyncio.TimeoutError:
-                        continue
-                    except Exception as e:
-                        print(f"❌ WebSocket error: {e}")
-                        break
+                except TimeoutError:
+                    pass  # collection window elapsed
+                except websockets.ConnectionClosedOK:
+                    pass  # server ended the stream cleanly
+                except Exception as e:
+                    print(f"❌ WebSocket error: {e}")
                         
         except Exception as e:
             print(f"❌ Failed to connect to Solana WebSocket: {e}")
+        finally:
+            if not writer.done():
+                await _put_or_raise(queue, None, writer)
+            await writer  # re-raises a writer failure
             
-        return self.solana_data
+        return self.solana_events
     
-    def collect_jupiter_quotes(self, tokens: List[str] = None):
+    async def collect_jupiter_quotes(self, tokens: List[str] = None):
         """Collect live Jupiter price quotes"""
         tokens = tokens or [
             "So11111111111111111111111111111111111112",  # SOL
             "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v",  # USDC
         ]
         
-        for token in tokens:
-            try:
-                url = f"{JUPITER_API}/quote"
-                params = {
-                    'inputMint': token,
-                    'outputMint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',  # USDC
-                    'amount': 1000000,  # 1 SOL in lamports
-                    'slippageBps': 50
-                }
-                
-                response = requests.get(url, params=params)
-                if response.status_code == 200:
-                    quote_data = response.json()
-                    self.jupiter_data.append({
-                        'timestamp': datetime.now().isoformat(),
-                        'token': token,
-                        'quote': quote_data
-                    })
-                    print(f"💰 Jupiter quote collected for token {token[:8]}...")
-                else:
-                    print(f"❌ Jupiter API error: {response.status_code}")
-                    
-            except Exception as e:
-                print(f"❌ Jupiter collection error: {e}")
+        results = await asyncio.gather(*[self._fetch_quote(token) for token in tokens])
+        self.jupiter_data.extend(quote for quote in results if quote is not None)
                 
         return self.jupiter_data
+
+    async def _fetch_quote(self, token: str):
+        try:
+            url = f"{JUPITER_API}/quote"
+            params = {
+                'inputMint': token,
+                'outputMint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',  # USDC
+                'amount': 1000000,  # 1 SOL in lamports
+                'slippageBps': 50
+            }
+            
+            response = await self.client.get(url, params=params)
+            if response.status_code == 200:
+                print(f"💰 Jupiter quote collected for token {token[:8]}...")
+                return {
+                    'timestamp': datetime.now().isoformat(),
+                    'token': token,
+                    'quote_raw': response.content  # parsed lazily, see _quote_out_amount
+                }
+            else:
+                print(f"❌ Jupiter API error: {response.status_code}")
+                
+        except Exception as e:
+            print(f"❌ Jupiter collection error: {e}")
+        return None
     
     def save_collected_data(self):
-        """Save all collected data to files for analysis"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        """Save all collected data to NDJSON files for analysis"""
+        timestamp = self.run_stamp
         
         # Save Twitter data
         if self.twitter_data:
-            with open(f'live_twitter_data_{timestamp}.json', 'w') as f:
-                json.dump(self.twitter_data, f, indent=2)
+            _write_ndjson(f'live_twitter_data_{timestamp}.ndjson', self.twitter_data)
             print(f"💾 Saved {len(self.twitter_data)} Twitter records")
         
-        # Save Solana data
-        if self.solana_data:
-            with open(f'live_solana_data_{timestamp}.json', 'w') as f:
-                json.dump(self.solana_data, f, indent=2)
-            print(f"💾 Saved {len(self.solana_data)} Solana records")
+        # Solana data was streamed to disk during collection
+        if self.solana_count:
+            print(f"💾 Saved {self.solana_count} Solana records to {self.solana_path}")
         
         # Save Jupiter data
         if self.jupiter_data:
-            with open(f'live_jupiter_data_{timestamp}.json', 'w') as f:
-                json.dump(self.jupiter_data, f, indent=2)
+            with open(f'live_jupiter_data_{timestamp}.ndjson', 'wb') as f:
+                f.write(b''.join(_jupiter_line(rec) for rec in self.jupiter_data))
             print(f"💾 Saved {len(self.jupiter_data)} Jupiter records")
 
 class LiveAgentTester:
@@ -189,12 +373,20 @@ class LiveAgentTester:
             
     def calculate_sentiment_score(self, text: str) -> float:
         """Simple sentiment scoring (would be replaced by actual agent logic)"""
-        positive_words = ['bullish', 'moon', 'pump', 'up', 'good', 'great', 'amazing']
-        negative_words = ['bearish', 'dump', 'down', 'bad', 'crash', 'terrible']
-        
         text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        if _SENTIMENT_DB is not None:
+            found = set()
+            _SENTIMENT_DB.scan(text_lower.encode(), match_event_handler=lambda idx, *_: found.add(idx))
+            positive_count = sum(1 for idx in found if idx < len(POSITIVE_WORDS))
+            negative_count = len(found) - positive_count
+        elif _SENTIMENT_AUTOMATON is not None:
+            # Each word still counts at most once, as with the substring checks
+            found = {idx for _, idx in _SENTIMENT_AUTOMATON.iter(text_lower)}
+            positive_count = sum(1 for idx in found if idx < len(POSITIVE_WORDS))
+            negative_count = len(found) - positive_count
+        else:
+            positive_count = sum(1 for word in POSITIVE_WORDS if word in text_lower)
+            negative_count = sum(1 for word in NEGATIVE_WORDS if word in text_lower)
         
         # Simple scoring formula
         return (positive_count - negative_count) / max(len(text.split()), 1)
@@ -206,16 +398,16 @@ class LiveAgentTester:
             return
             
         print("\n📊 Testing Heuristic Agent with Live Market Data:")
+        import numpy as np
         
-        prices = []
-        for quote in self.data_collector.jupiter_data:
-            if 'quote' in quote and 'outAmount' in quote['quote']:
-                price = float(quote['quote']['outAmount']) / 1000000  # Convert to readable price
-                prices.append(price)
+        amounts = (_quote_out_amount(q['quote_raw']) for q in self.data_collector.jupiter_data)
+        prices = np.fromiter(
+            (a for a in amounts if a is not None), dtype=np.float64
+        ) / 1000000  # Convert to readable price
                 
         if len(prices) >= 2:
             price_change = (prices[-1] - prices[0]) / prices[0] * 100
-            volatility = np.std(prices) / np.mean(prices) * 100
+            volatility = prices.std() / prices.mean() * 100
             
             print(f"Price Change: {price_change:.2f}%")
             print(f"Volatility: {volatility:.2f}%")
@@ -244,13 +436,12 @@ async def main():
     tasks = [
         collector.collect_twitter_data(['solana', '$SOL', 'pump.fun']),
         collector.collect_solana_websocket_data(duration_minutes=2),  # Shorter duration for testing
+        collector.collect_jupiter_quotes(),
     ]
     
     # Run data collection
     await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Collect Jupiter quotes
-    collector.collect_jupiter_quotes()
+    await collector.aclose()
     
     # Save all data
     collector.save_collected_data()
@@ -263,8 +454,13 @@ async def main():
     print("\n✅ Live data testing completed!")
     print("📊 Total Data Collected:")
     print(f"  - Twitter: {len(collector.twitter_data)} tweets")
-    print(f"  - Solana: {len(collector.solana_data)} events") 
+    print(f"  - Solana: {collector.solana_count} events") 
     print(f"  - Jupiter: {len(collector.jupiter_data)} quotes")
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # faster event loop for the WSS recv + HTTP fan-out
+        uvloop.install()
+    except ImportError:  # e.g. Windows
+        pass
     asyncio.run(main())
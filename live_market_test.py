@@ -4,12 +4,97 @@ Live Market Data Validation
 Tests real market APIs to validate agent performance with live data.
 """
 
-import requests
+import time
+import httpx
+import numpy as np
 import pytest
-from unittest.mock import patch, MagicMock
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# The scoring kernel is compiled to native code when Numba is installed.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda f: f
+
+SIGNALS = ("BUY", "SELL", "HOLD")
+NARRATIVES = (
+    "Social media buzzing with SOL pump posts",
+    "Positive sentiment in crypto communities",
+    "Market sentiment is fearful, FUD spreading",
+    "Some concerns about SOL price drop",
+    "Market is quiet, no strong narrative",
+)
+NARRATIVE_SIGNALS = ("STRONG_BULLISH", "BULLISH", "NEUTRAL", "BEARISH", "STRONG_BEARISH")
+
+# Decision tables, indexed by integer-encoded conditions instead of if/elif
+# ladders.  Heuristic case: 0 = neither, 1 = buy setup, 2 = sell setup.
+HEURISTIC_SIGNAL = np.array([2, 0, 1])            # HOLD, BUY, SELL
+HEURISTIC_CONFIDENCE = np.array([0.6, 0.8, 0.7])
+# Price-action bucket: 0 = < -5 %, 1 = [-5, -2), 2 = [-2, 2], 3 = (2, 5], 4 = > 5 %
+BUCKET_NARRATIVE = np.array([2, 3, 4, 1, 0])
+BUCKET_SENTIMENT = np.array([-0.6, -0.3, 0.0, 0.3, 0.6])
+BUCKET_NARRATIVE_SIGNAL = np.array([4, 3, 2, 1, 0])
+
+@njit(cache=True)
+def _score(change_24h, volume_24h):
+    """Heuristic + narrative scoring as plain floats and table indices.
+
+    Returns (volatility, volume, momentum, signal_idx, confidence,
+    narrative_idx, sentiment_bias, narrative_signal_idx); indices refer to
+    SIGNALS / NARRATIVES / NARRATIVE_SIGNALS.
+    """
+    volatility_score = abs(change_24h) / 10  # 0-1 scale
+    volume_score = min(volume_24h / 1_000_000_000, 1.0)  # Normalize to 1B volume
+    momentum_score = max(min(change_24h / 10, 1.0), -1.0)  # -1 to 1 scale
+    
+    # Generate trading signal (the buy and sell setups are mutually exclusive)
+    buy = (momentum_score > 0.3) & (volatility_score < 0.5) & (volume_score > 0.3)
+    sell = (momentum_score < -0.3) & (volume_score > 0.3)
+    case = int(buy) + 2 * int(sell)
+    signal, confidence = HEURISTIC_SIGNAL[case], HEURISTIC_CONFIDENCE[case]
+    
+    # Simulate social sentiment based on price action; written as negated
+    # comparisons so a NaN change lands in the neutral bucket, as before.
+    bucket = (int(not change_24h < -5) + int(not change_24h < -2)
+              + int(change_24h > 2) + int(change_24h > 5))
+    narrative, sentiment_bias = BUCKET_NARRATIVE[bucket], BUCKET_SENTIMENT[bucket]
+    narrative_signal = BUCKET_NARRATIVE_SIGNAL[bucket]
+    
+    return (volatility_score, volume_score, momentum_score, signal, confidence,
+            narrative, sentiment_bias, narrative_signal)
+
+# CoinGecko responses are reused for this many seconds (same URL + params),
+# sparing RTTs and 429s when the fixture is re-entered or the script re-run.
+PRICE_TTL_SEC = 30
+_price_cache = {}
+
+def _fetch_json(client, url, params):
+    """GET `url` and decode JSON, memoised for PRICE_TTL_SEC."""
+    key = (url, tuple(sorted(params.items())))
+    cached = _price_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < PRICE_TTL_SEC:
+        return cached[1]
+    response = client.get(url, params=params)
+    response.raise_for_status()  # Raise an exception for bad status codes
+    data = response.json()
+    _price_cache[key] = (time.monotonic(), data)
+    return data
+
+@pytest.fixture(scope="session")
+def http_client():
+    """One keep-alive (HTTP/2 when available) client shared by every test."""
+    client = httpx.Client(http2=HTTP2, timeout=10.0)
+    yield client
+    client.close()
 
 @pytest.fixture(scope="module")
-def live_sol_data():
+def live_sol_data(http_client):
     """Fixture to fetch live SOL price data from CoinGecko."""
     print("\n🔥 Fetching live market data from CoinGecko for tests...")
     try:
@@ -21,10 +106,7 @@ def live_sol_data():
             'include_24hr_vol': 'true'
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        
-        data = response.json()
+        data = _fetch_json(http_client, url, params)
         if 'solana' in data:
             sol_data = data['solana']
             price = sol_data['usd']
@@ -43,7 +125,7 @@ def live_sol_data():
         else:
             pytest.fail("❌ No 'solana' key in CoinGecko API response.")
             
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         pytest.fail(f"❌ CoinGecko API request failed: {e}")
     except Exception as e:
         pytest.fail(f"❌ Error fetching live data: {e}")
@@ -72,63 +154,25 @@ def test_agents_with_live_data(live_sol_data):
     print(f"Volume: ${volume_24h:,.0f}")
     
     # Calculate agent metrics
-    volatility_score = abs(change_24h) / 10  # 0-1 scale
-    volume_score = min(volume_24h / 1_000_000_000, 1.0)  # Normalize to 1B volume
-    momentum_score = max(min(change_24h / 10, 1.0), -1.0)  # -1 to 1 scale
+    (volatility_score, volume_score, momentum_score, signal_idx, confidence,
+     narrative_idx, sentiment_bias, narrative_signal_idx) = _score(float(change_24h), float(volume_24h))
     
     print(f"Volatility Score: {volatility_score:.2f}")
     print(f"Volume Score: {volume_score:.2f}")  
     print(f"Momentum Score: {momentum_score:.2f}")
     
-    # Generate trading signal
-    if momentum_score > 0.3 and volatility_score < 0.5 and volume_score > 0.3:
-        signal = "BUY"
-        confidence = 0.8
-    elif momentum_score < -0.3 and volume_score > 0.3:
-        signal = "SELL"
-        confidence = 0.7
-    else:
-        signal = "HOLD"
-        confidence = 0.6
-        
+    signal = SIGNALS[signal_idx]
     print(f"🎯 Heuristic Signal: {signal} (Confidence: {confidence:.1%})")
     assert signal in ["BUY", "SELL", "HOLD"]
     
     # 2. Narrative Agent Testing (simulated with realistic scenarios)
     print("\n📱 Narrative Agent Analysis:")
     
-    # Simulate social sentiment based on price action
-    if change_24h > 5:
-        sentiment_bias = 0.6  # Very bullish
-        narrative = "Social media buzzing with SOL pump posts"
-    elif change_24h > 2:
-        sentiment_bias = 0.3  # Moderately bullish
-        narrative = "Positive sentiment in crypto communities"
-    elif change_24h < -5:
-        sentiment_bias = -0.6  # Very bearish
-        narrative = "Market sentiment is fearful, FUD spreading"
-    elif change_24h < -2:
-        sentiment_bias = -0.3  # Moderately bearish
-        narrative = "Some concerns about SOL price drop"
-    else:
-        sentiment_bias = 0.0  # Neutral
-        narrative = "Market is quiet, no strong narrative"
-        
+    narrative = NARRATIVES[narrative_idx]
     print(f"Narrative: {narrative}")
     print(f"Sentiment Bias: {sentiment_bias:.2f}")
     
-    # Generate narrative signal
-    if sentiment_bias > 0.4:
-        narrative_signal = "STRONG_BULLISH"
-    elif sentiment_bias > 0.1:
-        narrative_signal = "BULLISH"
-    elif sentiment_bias < -0.4:
-        narrative_signal = "STRONG_BEARISH"
-    elif sentiment_bias < -0.1:
-        narrative_signal = "BEARISH"
-    else:
-        narrative_signal = "NEUTRAL"
-        
+    narrative_signal = NARRATIVE_SIGNALS[narrative_signal_idx]
     print(f"🎯 Narrative Signal: {narrative_signal}")
     assert narrative_signal in ["STRONG_BULLISH", "BULLISH", "NEUTRAL", "BEARISH", "STRONG_BEARISH"]
     print("✅ Agent tests with live data completed.")
@@ -173,32 +217,16 @@ def main():
     """Main function to run the test workflow"""
     # This function is for standalone script execution, not for pytest
     
-    # To run these tests as a script, we call the fixture function directly
-    # to get the data, and then pass it to the test functions.
-    
+    # The test functions only read the fixture's dict, so the script runner
+    # passes fixed sample data instead of hitting the API.
     print("Running live market tests as a standalone script...")
-    
-    # We can't use pytest fixtures directly, so we mock the API call
-    # for standalone execution to avoid test pollution.
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "solana": {
-            "usd": 150.0,
-            "usd_24h_change": 5.5,
-            "usd_24h_vol": 2_500_000_000
-        }
+    data = {
+        "price": 150.0,
+        "change_24h": 5.5,
+        "volume_24h": 2_500_000_000
     }
-    
-    with patch('requests.get', return_value=mock_response):
-        # Re-create the logic of the fixture for the script runner
-        data = {
-            "price": 150.0,
-            "change_24h": 5.5,
-            "volume_24h": 2_500_000_000
-        }
-        test_agents_with_live_data(data)
-        test_comprehensive_validator_with_live_data(data)
+    test_agents_with_live_data(data)
+    test_comprehensive_validator_with_live_data(data)
 
 if __name__ == "__main__":
     main()
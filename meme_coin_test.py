@@ -4,8 +4,82 @@ Meme Coin Trading System Live Test
 Tests the agents with real pump.fun meme coin data and social sentiment.
 """
 
+import functools
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pytest
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+BULLISH_MEME_WORDS = (
+    'moon', 'rocket', '🚀', 'gem', '💎', 'based', 'ape', 'fomo',
+    'pump', 'bullish', 'hodl', 'diamond hands', 'lambo', 'wagmi',
+    '1000x', '100x', 'degen', 'chad', 'alpha'
+)
+
+BEARISH_MEME_WORDS = (
+    'dump', 'rug', 'rekt', 'ngmi', 'bag holder', 'cope', 'seethe',
+    'exit liquidity', 'paper hands', 'fud', 'dead', 'scam', 'rugpull'
+)
+
+SENTIMENT_CACHE_SIZE = 131072  # distinct post texts kept (retweets repeat text)
+SENTIMENT_POOL_MIN_POSTS = 20_000  # smaller batches don't repay worker start-up
+SENTIMENT_POOL_CHUNKSIZE = 1024
+
+# Emojis add their weight on every occurrence (lexicon words count once)
+MEME_EMOJI_WEIGHTS = {'🚀': 1, '🌙': 1, '💎': 1, '😭': -1, '💀': -1}
+
+def _build_meme_automaton():
+    """One Aho-Corasick automaton over lexicons and emojis.
+
+    Values are (lexicon polarity, emoji weight, pattern); '🚀' and '💎' are
+    both a lexicon word and a weighted emoji.
+    """
+    if ahocorasick is None:
+        return None
+    polarity = dict.fromkeys(BULLISH_MEME_WORDS, 1)
+    polarity.update(dict.fromkeys(BEARISH_MEME_WORDS, -1))
+    automaton = ahocorasick.Automaton()
+    for pattern in polarity.keys() | MEME_EMOJI_WEIGHTS.keys():
+        automaton.add_word(pattern, (polarity.get(pattern, 0), MEME_EMOJI_WEIGHTS.get(pattern, 0), pattern))
+    automaton.make_automaton()
+    return automaton
+
+_MEME_AUTOMATON = _build_meme_automaton()
+
+# Numeric coin fields scored by the heuristic agent, as float64 columns
+COIN_COLUMNS = (
+    'holders', 'lp_ratio', 'volume_24h', 'price_change_5m',
+    'created_hours_ago', 'twitter_mentions'
+)
+
+# Heuristic signals in condition order; anything unmatched is WATCH
+SIGNAL_LABELS = ("STRONG BUY 🚀", "BUY 📈", "AVOID ❌")
+DEFAULT_SIGNAL = "WATCH 👀"
+
+# Risk factors are bits of a flag mask (bit i = RISK_FACTOR_NAMES[i]); the
+# level and factor list for each of the 16 masks are looked up, not rebuilt
+RISK_FACTOR_NAMES = ("Low holder count", "LP ratio risk", "Very new token", "High volatility")
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "EXTREME", "EXTREME")  # by risk-factor count
+RISK_LEVEL_BY_FLAGS = tuple(RISK_LEVELS[flags.bit_count()] for flags in range(1 << len(RISK_FACTOR_NAMES)))
+RISK_FACTORS_BY_FLAGS = tuple(
+    tuple(name for bit, name in enumerate(RISK_FACTOR_NAMES) if flags >> bit & 1)
+    for flags in range(1 << len(RISK_FACTOR_NAMES))
+)
+
+def coins_to_arrays(meme_coins):
+    """Column-wise (SoA) view of the coin list: {field: float64 ndarray}"""
+    return {
+        col: np.fromiter((coin[col] for coin in meme_coins), dtype=np.float64, count=len(meme_coins))
+        for col in COIN_COLUMNS
+    }
+
 @pytest.fixture(scope="module")
 def meme_coins():
     """Provides realistic pump.fun meme coin data."""
@@ -53,16 +127,19 @@ def meme_coins():
         }
     ]
     
-    print("📊 Current Meme Coin Market Data (from fixture):")
-    print("-" * 40)
+    # Reports are built as lines and written with one print per section
+    lines = ["📊 Current Meme Coin Market Data (from fixture):", "-" * 40]
     
     for coin in meme_coins_data:
-        print(f"🪙 {coin['name']}")
-        print(f"   Market Cap: ${coin['market_cap']:,}")
-        print(f"   Holders: {coin['holders']:,}")
-        print(f"   5m Change: {coin['price_change_5m']:+.1f}%")
-        print(f"   Social Buzz: {coin['twitter_mentions']} mentions")
-        print()
+        lines += [
+            f"🪙 {coin['name']}",
+            f"   Market Cap: ${coin['market_cap']:,}",
+            f"   Holders: {coin['holders']:,}",
+            f"   5m Change: {coin['price_change_5m']:+.1f}%",
+            f"   Social Buzz: {coin['twitter_mentions']} mentions",
+            "",
+        ]
+    print("\n".join(lines))
         
     return meme_coins_data
 
@@ -99,23 +176,38 @@ def coin_sentiments(meme_coins):
         }
     ]
     
+    # Normalize at ingest: engagement total is computed once per post
+    for post in social_posts:
+        engagement = post['engagement']
+        post['engagement_total'] = engagement['likes'] + engagement['retweets'] + engagement['replies']
+    
+    # Bucket posts by coin in one pass, then score all indexed posts as a batch
+    coin_names = {coin['name'] for coin in meme_coins}
+    posts_by_coin = defaultdict(list)
+    for post in social_posts:
+        if post['coin_mentioned'] in coin_names:
+            posts_by_coin[post['coin_mentioned']].append(post)
+    
+    indexed_posts = [post for posts in posts_by_coin.values() for post in posts]
+    for post, sentiment in zip(indexed_posts, score_posts([post['text'] for post in indexed_posts])):
+        post['sentiment'] = sentiment
+    
     coin_sentiments_data = {}
     
     for coin in meme_coins:
         coin_name = coin['name']
-        relevant_posts = [p for p in social_posts if p['coin_mentioned'] == coin_name]
+        relevant_posts = posts_by_coin.get(coin_name, ())
         
         if relevant_posts:
-            sentiments = []
+            # Running engagement-weighted sum; no intermediate arrays
+            weighted_sum = 0.0
             total_engagement = 0
-            
             for post in relevant_posts:
-                sentiment = calculate_meme_sentiment(post['text'])
-                engagement_weight = sum(post['engagement'].values())
-                sentiments.append(sentiment * engagement_weight)
+                engagement_weight = post['engagement_total']
+                weighted_sum += post['sentiment'] * engagement_weight
                 total_engagement += engagement_weight
             
-            weighted_sentiment = sum(sentiments) / max(total_engagement, 1)
+            weighted_sentiment = weighted_sum / max(total_engagement, 1)
             coin_sentiments_data[coin_name] = {
                 'sentiment': weighted_sentiment,
                 'post_count': len(relevant_posts),
@@ -135,62 +227,55 @@ def trading_signals(meme_coins, coin_sentiments):
     """Fixture to generate trading signals from the heuristic agent."""
     print("🧠 Generating trading signals (from fixture)")
     
-    trading_signals = {}
+    cols = coins_to_arrays(meme_coins)
+    sentiment_score = np.array(
+        [coin_sentiments.get(coin['name'], {}).get('sentiment', 0) for coin in meme_coins],
+        dtype=np.float64,
+    )
     
-    for coin in meme_coins:
-        coin_name = coin['name']
-        
-        # Meme-specific metrics
-        holder_growth_score = min(coin['holders'] / 2000, 1.0)  # Scale up
-        lp_health_score = coin['lp_ratio']
-        volume_score = min(coin['volume_24h'] / 500_000, 1.0) # Scale up
-        momentum_score = max(min(coin['price_change_5m'] / 100, 1), -1)
-        age_score = max(0, min(1 - (coin['created_hours_ago'] / 168), 1))
-        social_buzz_score = min(coin['twitter_mentions'] / 1000, 1.0) # Scale up
-        
-        sentiment_score = coin_sentiments.get(coin_name, {}).get('sentiment', 0)
-        
-        # Calculate composite score
-        technical_score = (holder_growth_score * 1.2 + lp_health_score + volume_score + 
-                          momentum_score * 1.5 + age_score) / 4.7
-        
-        social_score = (social_buzz_score * 1.2 + max(sentiment_score, 0) * 1.5) / 2.7
-        
-        composite_score = technical_score * 0.55 + social_score * 0.45
-        
-        # Generate signal
-        if composite_score > 0.7 and momentum_score > 0.5 and sentiment_score > 0.1:
-            signal = "STRONG BUY 🚀"
-            confidence = min(0.95, composite_score + 0.1)
-        elif composite_score > 0.55 and momentum_score > 0:
-            signal = "BUY 📈"
-            confidence = composite_score
-        elif composite_score < 0.45 or momentum_score < -0.2:
-            signal = "AVOID ❌"
-            confidence = 1 - composite_score
-        else:
-            signal = "WATCH 👀"
-            confidence = 0.5
-        
-        # Risk assessment
-        risk_factors = []
-        if coin['holders'] < 500:
-            risk_factors.append("Low holder count")
-        if coin['lp_ratio'] < 0.8:
-            risk_factors.append("LP ratio risk")
-        if coin['created_hours_ago'] < 1:
-            risk_factors.append("Very new token")
-        if abs(momentum_score) > 0.8:
-            risk_factors.append("High volatility")
-        
-        risk_level = "EXTREME" if len(risk_factors) >= 3 else "HIGH" if len(risk_factors) == 2 else "MEDIUM" if len(risk_factors) == 1 else "LOW"
-        
-        trading_signals[coin_name] = {
-            'signal': signal,
-            'confidence': confidence,
-            'composite_score': composite_score,
-            'risk_level': risk_level,
-            'risk_factors': risk_factors
+    # Meme-specific metrics, one vector op per score across all coins
+    holder_growth_score = np.minimum(cols['holders'] / 2000, 1.0)  # Scale up
+    lp_health_score = cols['lp_ratio']
+    volume_score = np.minimum(cols['volume_24h'] / 500_000, 1.0) # Scale up
+    momentum_score = np.clip(cols['price_change_5m'] / 100, -1, 1)
+    age_score = np.clip(1 - (cols['created_hours_ago'] / 168), 0, 1)
+    social_buzz_score = np.minimum(cols['twitter_mentions'] / 1000, 1.0) # Scale up
+    
+    # Calculate composite score
+    technical_score = (holder_growth_score * 1.2 + lp_health_score + volume_score + 
+                      momentum_score * 1.5 + age_score) / 4.7
+    
+    social_score = (social_buzz_score * 1.2 + np.maximum(sentiment_score, 0) * 1.5) / 2.7
+    
+    composite_score = technical_score * 0.55 + social_score * 0.45
+    
+    # Generate signal (first matching condition wins)
+    conditions = [
+        (composite_score > 0.7) & (momentum_score > 0.5) & (sentiment_score > 0.1),
+        (composite_score > 0.55) & (momentum_score > 0),
+        (composite_score < 0.45) | (momentum_score < -0.2),
+    ]
+    signal = np.select(conditions, SIGNAL_LABELS, default=DEFAULT_SIGNAL)
+    confidence = np.select(
+        conditions, [np.minimum(0.95, composite_score + 0.1), composite_score, 1 - composite_score], default=0.5
+    )
+    
+    # Risk assessment: OR each risk factor into its bit of a per-coin mask
+    risk_flags = (
+        (cols['holders'] < 500).astype(np.intp)
+        | (cols['lp_ratio'] < 0.8) << 1
+        | (cols['created_hours_ago'] < 1) << 2
+        | (np.abs(momentum_score) > 0.8) << 3
+    )
+    
+    trading_signals = {}
+    for i, coin in enumerate(meme_coins):
+        trading_signals[coin['name']] = {
+            'signal': str(signal[i]),
+            'confidence': float(confidence[i]),
+            'composite_score': float(composite_score[i]),
+            'risk_level': RISK_LEVEL_BY_FLAGS[risk_flags[i]],
+            'risk_factors': list(RISK_FACTORS_BY_FLAGS[risk_flags[i]])
         }
         
     return trading_signals
@@ -204,14 +289,15 @@ def test_meme_coin_data_fixture(meme_coins):
 
 def test_meme_narrative_agent(coin_sentiments):
     """Test narrative agent with meme coin social data"""
-    print("\n🤖 NARRATIVE AGENT: Meme Sentiment Analysis")
-    print("=" * 50)
+    lines = ["\n🤖 NARRATIVE AGENT: Meme Sentiment Analysis", "=" * 50]
     
     for coin_name, sentiment_data in coin_sentiments.items():
-        print(f"🪙 {coin_name}:")
-        print(f"   Sentiment Score: {sentiment_data['sentiment']:.3f}")
-        print(f"   Posts Analyzed: {sentiment_data['post_count']}")
-        print(f"   Total Engagement: {sentiment_data['total_engagement']}")
+        lines += [
+            f"🪙 {coin_name}:",
+            f"   Sentiment Score: {sentiment_data['sentiment']:.3f}",
+            f"   Posts Analyzed: {sentiment_data['post_count']}",
+            f"   Total Engagement: {sentiment_data['total_engagement']}",
+        ]
         
         if sentiment_data['sentiment'] > 0.3:
             narrative_signal = "BULLISH 🚀"
@@ -220,59 +306,95 @@ def test_meme_narrative_agent(coin_sentiments):
         else:
             narrative_signal = "NEUTRAL 😐"
             
-        print(f"   🎯 Narrative Signal: {narrative_signal}")
-        print()
+        lines += [f"   🎯 Narrative Signal: {narrative_signal}", ""]
+    print("\n".join(lines))
 
     assert coin_sentiments['PEPE2024']['sentiment'] > 0.25, "PEPE2024 should have bullish sentiment"
     assert coin_sentiments['DOGWIFHAT']['sentiment'] < 0, "DOGWIFHAT should have bearish sentiment"
     assert coin_sentiments['BONKINU']['sentiment'] > 0, "BONKINU should have positive sentiment"
     print("✅ Narrative agent produced expected sentiment signals.")
 
+@functools.lru_cache(maxsize=SENTIMENT_CACHE_SIZE)
 def calculate_meme_sentiment(text):
-    """Calculate sentiment specific to meme coin culture"""
-    bullish_meme_words = [
-        'moon', 'rocket', '🚀', 'gem', '💎', 'based', 'ape', 'fomo', 
-        'pump', 'bullish', 'hodl', 'diamond hands', 'lambo', 'wagmi',
-        '1000x', '100x', 'degen', 'chad', 'alpha'
-    ]
-    
-    bearish_meme_words = [
-        'dump', 'rug', 'rekt', 'ngmi', 'bag holder', 'cope', 'seethe',
-        'exit liquidity', 'paper hands', 'fud', 'dead', 'scam', 'rugpull'
-    ]
-    
+    """Calculate sentiment specific to meme coin culture (pure, cached by text)"""
     text_lower = text.lower()
     
-    bullish_count = sum(1 for word in bullish_meme_words if word in text_lower)
-    bearish_count = sum(1 for word in bearish_meme_words if word in text_lower)
-    
-    # Factor in emojis
-    rocket_count = text.count('🚀') + text.count('🌙')
-    diamond_count = text.count('💎')
-    crying_count = text.count('😭') + text.count('💀')
-    
-    total_signals = bullish_count + bearish_count + rocket_count + diamond_count + crying_count
-    
-    if total_signals == 0:
-        return 0.0
+    if _MEME_AUTOMATON is not None:
+        # Single pass over the text for words and emojis alike; each lexicon
+        # word counts at most once, matching the substring checks below
+        word_polarity = {}
+        emoji_score = 0
+        for _, (polarity, emoji_weight, pattern) in _MEME_AUTOMATON.iter(text_lower):
+            if polarity:
+                word_polarity[pattern] = polarity
+            emoji_score += emoji_weight
+        score = sum(word_polarity.values()) + emoji_score
+    else:
+        bullish_count = sum(1 for word in BULLISH_MEME_WORDS if word in text_lower)
+        bearish_count = sum(1 for word in BEARISH_MEME_WORDS if word in text_lower)
+        # Factor in emojis
+        score = bullish_count - bearish_count + sum(
+            weight * text.count(emoji) for emoji, weight in MEME_EMOJI_WEIGHTS.items()
+        )
     
-    sentiment = (bullish_count + rocket_count + diamond_count - bearish_count - crying_count) / max(len(text.split()), 1)
-    return sentiment
+    # No signals at all also scores 0.0
+    return score / max(len(text.split()), 1)
+
+def score_posts(texts):
+    """Meme sentiment for each text, fanned out to worker processes for large batches.
+
+    Only distinct texts are sent; each worker imports this module, so it
+    builds the automaton once and keeps its own sentiment cache.
+    """
+    if len(texts) < SENTIMENT_POOL_MIN_POSTS or (os.cpu_count() or 1) < 2:
+        return [calculate_meme_sentiment(text) for text in texts]
+    unique_texts = list(dict.fromkeys(texts))
+    with ProcessPoolExecutor() as pool:
+        scores = dict(zip(unique_texts, pool.map(
+            calculate_meme_sentiment, unique_texts, chunksize=SENTIMENT_POOL_CHUNKSIZE
+        )))
+    return [scores[text] for text in texts]
+
+def test_score_posts_pool_matches_serial(monkeypatch):
+    """The worker-process path scores exactly like the in-process one"""
+    texts = [
+        "🚀🚀 to the moon, diamond hands 💎",
+        "rug pull incoming, dump it 📉",
+        "gm frens, wagmi 🐸",
+        "just a normal post",
+    ] * 8
+    serial = [calculate_meme_sentiment.__wrapped__(text) for text in texts]
+
+    pools = []
+
+    class RecordingPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setitem(globals(), "SENTIMENT_POOL_MIN_POSTS", 1)
+    monkeypatch.setitem(globals(), "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+
+    assert score_posts(texts) == serial
+    assert len(pools) == 1
 
 def test_meme_heuristic_agent(trading_signals):
     """Test heuristic agent with meme coin trading signals"""
-    print("🧠 HEURISTIC AGENT: Meme Trading Signals")
-    print("=" * 50)
+    lines = ["🧠 HEURISTIC AGENT: Meme Trading Signals", "=" * 50]
 
     for coin_name, analysis in trading_signals.items():
-        print(f"🪙 {coin_name} Analysis:")
-        print(f"   📊 Composite Score: {analysis['composite_score']:.2f}")
-        print(f"   🎯 Signal: {analysis['signal']}")
-        print(f"   💪 Confidence: {analysis.get('confidence', 0.0):.1%}")
-        print(f"   ⚠️  Risk: {analysis['risk_level']}")
+        lines += [
+            f"🪙 {coin_name} Analysis:",
+            f"   📊 Composite Score: {analysis['composite_score']:.2f}",
+            f"   🎯 Signal: {analysis['signal']}",
+            f"   💪 Confidence: {analysis.get('confidence', 0.0):.1%}",
+            f"   ⚠️  Risk: {analysis['risk_level']}",
+        ]
         if analysis['risk_factors']:
-            print(f"   🚨 Risk Factors: {', '.join(analysis['risk_factors'])}")
-        print()
+            lines.append(f"   🚨 Risk Factors: {', '.join(analysis['risk_factors'])}")
+        lines.append("")
+    print("\n".join(lines))
 
     assert "PEPE2024" in trading_signals
     assert trading_signals["PEPE2024"]["signal"] == "STRONG BUY 🚀"
@@ -285,8 +407,7 @@ def test_meme_heuristic_agent(trading_signals):
 
 def test_comprehensive_validator(meme_coins, trading_signals):
     """Test comprehensive validator with meme coin trades"""
-    print("🛡️ COMPREHENSIVE VALIDATOR: Risk & Compliance Checks")
-    print("=" * 60)
+    lines = ["🛡️ COMPREHENSIVE VALIDATOR: Risk & Compliance Checks", "=" * 60]
     
     validated_trades = []
     
@@ -313,12 +434,15 @@ def test_comprehensive_validator(meme_coins, trading_signals):
         else:
             decision = "REJECTED"
             
-        print(f"🪙 {coin['name']}:")
-        print(f"   Is Compliant: {is_compliant}")
-        print(f"   Is Risky: {is_risky}")
-        print(f"   Final Decision: {decision}")
-        print(f"   Reason: {', '.join(reason) if reason else 'N/A'}")
-        print()
+        lines += [
+            f"🪙 {coin['name']}:",
+            f"   Is Compliant: {is_compliant}",
+            f"   Is Risky: {is_risky}",
+            f"   Final Decision: {decision}",
+            f"   Reason: {', '.join(reason) if reason else 'N/A'}",
+            "",
+        ]
+    print("\n".join(lines))
 
     validated_names = [c["name"] for c in validated_trades]
     assert "PEPE2024" in validated_names
@@ -327,12 +451,13 @@ def test_comprehensive_validator(meme_coins, trading_signals):
     print("✅ Comprehensive validator correctly approved and rejected trades.")
 
 
+# Mock OFAC sanctions list; only membership is ever checked
+OFAC_SANCTIONED_ADDRESSES = frozenset({
+    "1a2b3c4d5e6f7g8h9i0j",  # Tornado Cash
+    "2a3b4c5d6e7f8g9h0i1j",  # Lazarus Group
+    "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263",  # Test Sanctioned Address (BONKINU)
+})
+
 def check_ofac_sanctions(address):
     """Mock function to check OFAC sanctions list"""
-    sanctioned_addresses = {
-        "1a2b3c4d5e6f7g8h9i0j": "Tornado Cash",
-        "2a3b4c5d6e7f8g9h0i1j": "Lazarus Group",
-        "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": "Test Sanctioned Address" # BONKINU
-    }
-    
-    return address in sanctioned_addresses
+    return address in OFAC_SANCTIONED_ADDRESSES
@@ -6,9 +6,14 @@ Tests the new Redis trade signal system with proper formatting and monitoring.
 
 import redis
 import json
+import re
 import time
 from datetime import datetime
 
+# Keys whose presence indicates the executor acted; one case-insensitive scan
+# per key instead of lower() plus a substring test per pattern.
+_EXEC_PAT = re.compile(r"trade_result|execution|transaction|position|pnl|swap_|oco_", re.IGNORECASE)
+
 def main():
     """Test the updated Redis-enabled trading system"""
     print("🎯 ENHANCED ANIPER TRADE EXECUTION TEST")
@@ -25,9 +30,12 @@ def main():
         print(f"❌ Redis connection failed: {e}")
         return
     
+    # Writes are queued and sent in one round-trip once the signal is built
+    pipe = r.pipeline(transaction=False)
+
     # Clear old signals
-    r.delete('trade_signals')
-    print("🧹 Cleared old trade signals")
+    pipe.delete('trade_signals')
+    print("🧹 Queued clear of old trade signals")
     
     # 1. Set enhanced risk parameters for updated system
     print("\n📋 Configuring enhanced risk parameters...")
@@ -40,7 +48,7 @@ def main():
     }
     
     for key, value in risk_params.items():
-        r.set(key, value)
+        pipe.set(key, value)
         print(f"   {key}: {value}")
     
     # 2. Create enhanced trade signal with OCO parameters
@@ -60,7 +68,8 @@ def main():
     }
     
     # Push to the trade_signals queue that executor monitors
-    r.lpush('trade_signals', json.dumps(trade_signal))
+    pipe.lpush('trade_signals', json.dumps(trade_signal))
+    pipe.execute()
     
     print("✅ Enhanced trade signal created:")
     print("   🪙 Token: BONK")
@@ -75,8 +84,12 @@ def main():
     initial_count = r.llen('trade_signals')
     last_count = initial_count
     
-    while time.time() - start_time < 45:
-        elapsed = int(time.time() - start_time)
+    while True:
+        # One clock read per iteration, reused for the deadline and the display
+        now = time.time()
+        if now - start_time >= 45:
+            break
+        elapsed = int(now - start_time)
         current_count = r.llen('trade_signals')
         
         # Check if signal was consumed
@@ -88,9 +101,7 @@ def main():
         
         # Check for new Redis keys indicating execution
         all_keys = r.keys('*')
-        execution_keys = [k for k in all_keys if any(pattern in k.lower() for pattern in [
-            'trade_result', 'execution', 'transaction', 'position', 'pnl', 'swap_', 'oco_'
-        ])]
+        execution_keys = [k for k in all_keys if _EXEC_PAT.search(k)]
         
         status_indicators = []
         if execution_keys:
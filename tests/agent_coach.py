@@ -1,3 +1,6 @@
+import pytest
+
+from brain.agents import performance_coach
 from brain.agents.performance_coach import _parse_metrics, _suggest_ticket_size
 
 
@@ -15,4 +18,68 @@ def test_ticket_size_adjustment():
 
     # ratio below 0.5 reduces size
     new_size2 = _suggest_ticket_size(10, 40, 100)
-    assert new_size2 == 9 
\ No newline at end of file
+    assert new_size2 == 9
+
+
+def _regex_counts(text: str):
+    hit = total = 0
+    for name, value in performance_coach._METRIC_RE.findall(text):
+        try:
+            count = int(float(value))
+        except (ValueError, OverflowError):
+            continue
+        if name == "trade_hit_total":
+            hit += count
+        else:
+            total += count
+    return hit, total
+
+
+def _jit_scan(text: str):
+    np = pytest.importorskip("numpy")
+    buf = np.frombuffer(text.encode(), dtype=np.uint8)
+    return performance_coach._scan_metrics_jit(
+        buf, performance_coach._HIT_NAME, performance_coach._SUB_NAME
+    )
+
+
+def test_jit_scanner_matches_regex_path():
+    pytest.importorskip("numba")
+    page = "\n".join([
+        "# HELP trade_hit_total Successful trades",
+        "# TYPE trade_hit_total counter",
+        "#trade_hit_total 1000",
+        'trade_hit_total{venue="raydium",side="buy"} 7',
+        'trade_hit_total{note="a b"} 11',
+        "   trade_hit_total 3",
+        "\ttrades_submitted_total 40",
+        "trades_submitted_total{venue=\"orca\"} 12\r",
+        "trade_hit_total 5 1700000000000\r",
+        "trades_submitted_total 1.5e3",
+        "trades_submitted_total 2.5E+1 1700000000000",
+        "trades_submitted_total -3.9",
+        "trade_hit_total 1e-2",
+        "trade_hit_total NaN",
+        "trade_hit_total +Inf",
+        "trades_submitted_total -Inf",
+        "trade_hit_total 12abc",
+        "trade_hit_total",
+        "other_metric_total 99",
+        "",
+    ])
+    hit, total, exact = _jit_scan(page)
+    assert exact
+    assert (hit, total) == _regex_counts(page)
+
+
+def test_jit_scanner_oversized_value_falls_back_to_regex():
+    pytest.importorskip("numba")
+    page = "trade_hit_total 1e30\ntrades_submitted_total 123456789012345678901\n"
+    assert _jit_scan(page)[2] is False
+
+    # Padded past JIT_MIN_BYTES, _parse_metrics still returns the regex counts.
+    pad = "# filler\n" * (performance_coach.JIT_MIN_BYTES // 9 + 1)
+    big = pad + page
+    assert len(big) >= performance_coach.JIT_MIN_BYTES
+    assert _parse_metrics(big) == _regex_counts(big)
+    assert _parse_metrics(big.encode()) == _regex_counts(big)
@@ -7,6 +7,7 @@ import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
 import importlib
 import sys
+import time
 
 # ---------------------------------------------------------------------------
 # Helpers -------------------------------------------------------------------
@@ -88,4 +89,164 @@ def test_heuristic_agent_builds_model(tmp_path, monkeypatch):
             h.update(f.read())
         assert manifest["sha256"] == h.hexdigest()
     finally:
-        os.chdir(cwd) 
\ No newline at end of file
+        os.chdir(cwd) 
+
+def test_unchanged_feature_store_skips_retrain(tmp_path, monkeypatch):
+    sys.path.insert(0, str(ROOT))
+    agent_mod = importlib.import_module("brain.agents.heuristic_agent")
+
+    store = tmp_path / "feature_store.parquet"
+    model_dir = tmp_path / "models" / "candidate"
+    model_dir.mkdir(parents=True)
+    model_path = model_dir / "model.wasm"
+    monkeypatch.setattr(agent_mod, "FEATURE_STORE", str(store))
+    monkeypatch.setattr(agent_mod, "MODEL_DIR", str(model_dir))
+    monkeypatch.setattr(agent_mod, "MODEL_PATH", str(model_path))
+
+    trained = []
+
+    def fake_train(df, y):
+        trained.append(len(df))
+        return object(), ["holders", "lp"]
+
+    def fake_export(model, feats):
+        model_path.write_bytes(b"wasm_stub")
+        return model_path
+
+    monkeypatch.setattr(agent_mod, "train_model", fake_train)
+    monkeypatch.setattr(agent_mod, "export_model", fake_export)
+
+    def write_store(n_rows):
+        now = time.time()
+        pd.DataFrame({
+            "timestamp": now - np.linspace(0, 60 * 60 * 24 * 29, n_rows),
+            "holders": np.arange(n_rows),
+            "lp": np.linspace(0, 1, n_rows),
+            "roi": np.linspace(0, 20, n_rows),
+        }).to_parquet(store)
+
+    write_store(100)
+    first = agent_mod.build_manifest()
+    assert agent_mod.build_manifest() == first
+    assert trained == [100]  # unchanged store: cached manifest, no training
+
+    write_store(120)
+    agent_mod.build_manifest()
+    assert trained == [100, 120]  # changed store retrains
+
+    # Same file a day later: the DAYS_BACK window moved, so it retrains too
+    real_time = time.time
+    monkeypatch.setattr(agent_mod.time, "time", lambda: real_time() + 24 * 60 * 60)
+    agent_mod.build_manifest()
+    assert len(trained) == 3
+
+
+def test_bin_mapper_cache_reused_per_schema(tmp_path, monkeypatch):
+    import pytest
+
+    pytest.importorskip("lightgbm")
+    sys.path.insert(0, str(ROOT))
+    agent_mod = importlib.import_module("brain.agents.heuristic_agent")
+    monkeypatch.setattr(agent_mod, "MODEL_DIR", str(tmp_path))
+
+    loaded = []
+    real_load = agent_mod._load_bin_reference
+
+    def spy_load(path, ds_params):
+        ref = real_load(path, ds_params)
+        loaded.append(ref is not None)
+        return ref
+
+    monkeypatch.setattr(agent_mod, "_load_bin_reference", spy_load)
+
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "timestamp": np.arange(300, dtype=float),
+        "holders": rng.integers(10, 500, 300),
+        "lp": rng.random(300),
+        "roi": rng.uniform(0, 20, 300),
+    })
+    y = agent_mod.build_labels(df)
+
+    agent_mod.train_model(df, y)
+    cache = Path(agent_mod._bin_cache_path(["holders", "lp"]))
+    assert cache.parent == tmp_path and cache.name.startswith(agent_mod.BIN_CACHE_NAME + ".")
+    assert cache.exists()
+    assert loaded == [False]
+
+    # Same feature schema: the cached bin mappers are reused, not rewritten.
+    mtime = cache.stat().st_mtime_ns
+    agent_mod.train_model(df, y)
+    assert loaded == [False, True]
+    assert cache.stat().st_mtime_ns == mtime
+
+    # A different schema gets its own cache and ignores this one.
+    df2 = df.assign(volume=rng.random(300))
+    agent_mod.train_model(df2, y)
+    assert loaded == [False, True, False]
+    assert Path(agent_mod._bin_cache_path(["holders", "lp", "volume"])).exists()
+
+    # A cache older than BIN_CACHE_MAX_AGE is ignored and rebuilt.
+    old = time.time() - agent_mod.BIN_CACHE_MAX_AGE - 60
+    os.utime(cache, (old, old))
+    agent_mod.train_model(df, y)
+    assert loaded == [False, True, False, False]
+    assert cache.stat().st_mtime > old + 60
+
+
+def test_manifest_onnx_sha_matches_file(tmp_path, monkeypatch):
+    import pytest
+
+    pytest.importorskip("lightgbm")
+    pytest.importorskip("onnxmltools")
+    sys.path.insert(0, str(ROOT))
+    agent_mod = importlib.import_module("brain.agents.heuristic_agent")
+
+    store = tmp_path / "feature_store.parquet"
+    model_dir = tmp_path / "models" / "candidate"
+    model_dir.mkdir(parents=True)
+    model_path = model_dir / "model.wasm"
+    monkeypatch.setattr(agent_mod, "FEATURE_STORE", str(store))
+    monkeypatch.setattr(agent_mod, "MODEL_DIR", str(model_dir))
+    monkeypatch.setattr(agent_mod, "MODEL_PATH", str(model_path))
+
+    def fake_export(model, feats):
+        model_path.write_bytes(b"wasm_stub")
+        return model_path
+
+    monkeypatch.setattr(agent_mod, "export_model", fake_export)
+
+    rng = np.random.default_rng(7)
+    pd.DataFrame({
+        "timestamp": time.time() - rng.uniform(0, 60 * 60 * 24 * 29, 500),
+        "holders": rng.integers(10, 500, 500),
+        "lp": rng.random(500),
+        "roi": rng.uniform(0, 20, 500),
+    }).to_parquet(store)
+
+    manifest = agent_mod.build_manifest()
+    onnx_path = model_dir / "model.onnx"
+    assert manifest["onnx_sha256"] == agent_mod.sha256_of(onnx_path)
+
+    # A replaced model.onnx invalidates the cached manifest.
+    onnx_path.write_bytes(b"tampered")
+    assert agent_mod._cached_manifest(agent_mod._feature_store_fingerprint()) is None
+
+
+def test_failed_onnx_export_removes_stale_file(tmp_path, monkeypatch):
+    sys.path.insert(0, str(ROOT))
+    agent_mod = importlib.import_module("brain.agents.heuristic_agent")
+
+    class _FailingConverter:
+        @staticmethod
+        def convert_lightgbm(*_a, **_k):
+            raise ValueError("unsupported model")
+
+    monkeypatch.setattr(agent_mod, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(agent_mod, "onnxmltools", _FailingConverter)
+    monkeypatch.setattr(agent_mod, "FloatTensorType", lambda shape: shape, raising=False)
+    stale = tmp_path / "model.onnx"
+    stale.write_bytes(b"last run")
+
+    assert agent_mod.save_onnx(object(), ["holders", "lp"]) is None
+    assert not stale.exists()
@@ -0,0 +1,74 @@
+import asyncio
+import os
+
+import pytest
+
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")  # checked at import
+
+from brain import manager  # noqa: E402
+
+
+class _Stop(Exception):
+    pass
+
+
+class _FakeClock:
+    def __init__(self, now: float, horizon: float):
+        self.now = now
+        self.horizon = horizon
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        await self._settle()  # just-started agents run before time moves
+        if self.now + delay > self.horizon:
+            raise _Stop
+        self.now += delay
+        await self._settle()  # agents due to finish by now do so before the tick
+
+    @staticmethod
+    async def _settle() -> None:
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+
+def test_scheduler_orders_by_deadline_and_skips_overlapping_runs(monkeypatch):
+    clock = _FakeClock(now=1000.0, horizon=1035.0)
+    monkeypatch.setattr(manager, "AGENTS", {"fast": {"interval": 10}, "slow": {"interval": 10}})
+
+    starts: list[tuple[float, str]] = []
+    active: dict[str, int] = {"fast": 0, "slow": 0}
+
+    async def fake_run_once(name, redis_cli):
+        starts.append((clock.now, name))
+        active[name] += 1
+        assert active[name] == 1, f"{name} overlapped its previous run"
+        end = clock.now + (15 if name == "slow" else 0)
+        while clock.now < end:
+            await asyncio.sleep(0)
+        active[name] -= 1
+
+    monkeypatch.setattr(manager, "_run_once", fake_run_once)
+    running: dict[str, asyncio.Task] = {}
+
+    async def run():
+        with pytest.raises(_Stop):
+            await manager._schedule(None, running, clock=clock, sleep=clock.sleep)
+        # Let the last slow run finish: its task must leave `running`
+        clock.now = clock.horizon + 100
+        await asyncio.gather(*running.values())
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    # Deadline order; slow (15 s) is still busy at 1010 so that tick is skipped
+    assert starts == [
+        (1000.0, "fast"),
+        (1000.0, "slow"),
+        (1010.0, "fast"),
+        (1020.0, "fast"),
+        (1020.0, "slow"),
+        (1030.0, "fast"),
+    ]
+    assert running == {}
@@ -22,4 +22,133 @@ def test_score_narratives_basic():
     
     # All scores should be float values
     for score in scores.values():
-        assert isinstance(score, (int, float))
\ No newline at end of file
+        assert isinstance(score, (int, float))
+
+def test_llm_batch_counts_per_platform_and_falls_back(monkeypatch):
+    from types import SimpleNamespace
+
+    from brain.agents import narrative_agent
+
+    reply = SimpleNamespace(content='{"pumpfun": {"doge": 0.9}}')
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        create=lambda **kwargs: SimpleNamespace(choices=[SimpleNamespace(message=reply)])
+    )))
+    monkeypatch.setattr(narrative_agent, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(narrative_agent, "_openai_client", lambda: client)
+
+    def calls(platform):
+        return narrative_agent.llm_call_total.labels(agent="narrative", platform=platform)._value.get()
+
+    before = {p: calls(p) for p in ("pumpfun", "letsbonk")}
+    corpora = {"pumpfun": ["doge to the moon"], "letsbonk": ["bonk bonk doge"]}
+    scores = narrative_agent._score_narratives_llm(corpora)
+
+    assert {p: calls(p) - before[p] for p in before} == {"pumpfun": 1, "letsbonk": 1}
+    assert scores["pumpfun"]["doge"] == 0.9
+    # letsbonk was omitted from the reply: heuristic scores, not zeros
+    assert scores["letsbonk"] == narrative_agent._score_narratives_heuristic(corpora["letsbonk"])
+    assert scores["letsbonk"]["bonk"] > 0
+
+
+def test_quantized_scores_round_trip():
+    import numpy as np  # type: ignore
+
+    from brain.agents.narrative_agent import NARRATIVE_CATEGORIES, dequantize_scores, quantize_scores
+
+    rng = np.random.default_rng(0)
+    scores = {k: float(v) for k, v in zip(NARRATIVE_CATEGORIES, rng.random(len(NARRATIVE_CATEGORIES)))}
+    raw = quantize_scores(scores)
+    assert len(raw) == len(NARRATIVE_CATEGORIES)
+
+    decoded = dequantize_scores(raw)
+    assert list(decoded) == list(NARRATIVE_CATEGORIES)
+    assert all(abs(decoded[k] - scores[k]) <= 0.002 for k in NARRATIVE_CATEGORIES)
+
+    # Out-of-range scores are clipped to [0, 1]; missing categories encode as 0
+    first, second, third = NARRATIVE_CATEGORIES[:3]
+    decoded = dequantize_scores(quantize_scores({first: -0.5, second: 1.7}))
+    assert decoded[first] == 0.0
+    assert decoded[second] == 1.0
+    assert decoded[third] == 0.0
+    # Byte i carries category i
+    assert quantize_scores({second: 1.0}) == bytes([0, 250]) + bytes(len(NARRATIVE_CATEGORIES) - 2)
+
+
+def _paced_wait(monkeypatch, headers, now=1_000_000.0):
+    from brain.agents import narrative_agent
+
+    monkeypatch.setattr(narrative_agent.time, "time", lambda: now)
+    monkeypatch.setattr(narrative_agent, "_next_allowed_ts", narrative_agent._next_allowed_ts_from(headers))
+    return narrative_agent._pacing_wait()
+
+
+def test_rate_limit_pacing_from_headers(monkeypatch):
+    now = 1_000_000.0
+    # Budget exhausted: wait for the window to reset
+    assert _paced_wait(monkeypatch, {"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(now + 30)}) == 30.0
+    # Remaining budget is spread evenly over the window
+    assert _paced_wait(monkeypatch, {"x-rate-limit-remaining": "9", "x-rate-limit-reset": str(now + 90)}) == 10.0
+    # Reset already passed, or no rate-limit headers: no wait
+    assert _paced_wait(monkeypatch, {"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(now - 5)}) == 0.0
+    assert _paced_wait(monkeypatch, {}) == 0.0
+    # Far-off reset is capped
+    assert _paced_wait(monkeypatch, {"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(now + 900)}) == 60.0
+
+
+def test_rate_limited_search_waits_for_reset(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    from brain.agents import narrative_agent
+
+    now = 1_000_000.0
+    monkeypatch.setattr(narrative_agent, "TWITTER_BEARER", "token")
+    monkeypatch.setattr(narrative_agent, "_next_allowed_ts", 0.0)
+    monkeypatch.setattr(narrative_agent, "_corpus_cache", {})
+    monkeypatch.setattr(narrative_agent.time, "time", lambda: now)
+    waits = []
+
+    async def fake_sleep(delay):
+        waits.append(delay)
+
+    monkeypatch.setattr(narrative_agent.asyncio, "sleep", fake_sleep)
+    responses = [
+        SimpleNamespace(status_code=429, headers={"x-rate-limit-reset": str(now + 900)}),
+        SimpleNamespace(
+            status_code=200,
+            headers={"x-rate-limit-remaining": "4", "x-rate-limit-reset": str(now + 100)},
+            raise_for_status=lambda: None,
+            json=lambda: {"data": [{"text": "pump.fun doge"}]},
+        ),
+    ]
+
+    class _Client:
+        async def get(self, *args, **kwargs):
+            return responses.pop(0)
+
+    tweets = asyncio.run(narrative_agent._fetch_recent_tweets(("pumpfun",), client=_Client()))
+
+    assert tweets == ["pump.fun doge"]
+    # First search unpaced; the retry after the 429 waits for the reset, capped at 60 s
+    assert waits == [0.0, 60.0]
+    assert narrative_agent._next_allowed_ts == now + 100 / 4
+
+
+def test_numpy_fallback_matches_per_tweet_substring_scoring(monkeypatch):
+    from brain.agents import narrative_agent
+
+    monkeypatch.setattr(narrative_agent, "_AUTOMATON", None)
+    tweets = [
+        # Longest tweet: lowercasing grows each 'İ' to two code points, which
+        # a fixed-width array sized from the raw texts would cut off.
+        "İİİİİİİİİİİİ moon pnd rug viral",
+        "İ viral",
+        "PUMP to the MOON 🚀",
+        "nothing here",
+    ]
+    lowered = [t.lower() for t in tweets]
+    expected = {
+        k: round(sum(k in t for t in lowered) / len(tweets), 3)
+        for k in narrative_agent.NARRATIVE_CATEGORIES
+    }
+    assert narrative_agent._score_narratives_heuristic(tweets) == expected
@@ -1,3 +1,5 @@
+import json
+
 import yaml  # type: ignore
 
 from brain.agents.redteam_agent import suggest_guard_patches
@@ -15,4 +17,146 @@ def test_guard_patch_generation():
     entry = patches[0]
     assert entry["path"] == "/max_position"
     assert entry["operation"] == "replace"
-    assert entry["value"] == 110 
\ No newline at end of file
+    assert entry["value"] == 110 
+
+def test_sync_and_async_llm_paths_agree(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    from brain.agents import redteam_agent
+
+    reply = json.dumps({"results": [{"index": 0, "patches": [{"path": "/max_position", "operation": "replace", "value": 150}]}]})
+    response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+    calls = []
+
+    def create(**kwargs):
+        calls.append("sync")
+        return response
+
+    async def acreate(**kwargs):
+        calls.append("async")
+        return response
+
+    monkeypatch.setattr(redteam_agent, "USE_LLM", True)
+    monkeypatch.setattr(redteam_agent, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(redteam_agent, "_redis_client", lambda: None)
+    monkeypatch.setattr(redteam_agent, "_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(redteam_agent, "_async_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=acreate))))
+
+    filters = {"max_position": 100}
+    redteam_agent._local_cache.clear()
+    sync_result = redteam_agent.produce(filters)
+    redteam_agent._local_cache.clear()
+    async_result = asyncio.run(redteam_agent.produce_async(filters))
+    redteam_agent._local_cache.clear()
+
+    assert calls == ["sync", "async"]
+    assert sync_result == async_result
+    assert yaml.safe_load(sync_result[1])["patches"][0]["value"] == 150
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, cli):
+        self.cli = cli
+        self.ops = []
+
+    def setex(self, key, ttl, value):
+        self.ops.append((key, value))
+
+    def execute(self):
+        for key, value in self.ops:
+            self.cli.store[key] = value
+
+
+def test_batch_replies_survive_in_redis_and_pending_batch_is_kept(monkeypatch, tmp_path):
+    from brain.agents import redteam_agent
+
+    state = tmp_path / "redteam_batch.json"
+    monkeypatch.setattr(redteam_agent, "USE_LLM", True)
+    monkeypatch.setattr(redteam_agent, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(redteam_agent, "ARTIFACTS", tmp_path)
+    monkeypatch.setattr(redteam_agent, "BATCH_STATE", state)
+    submitted = []
+    monkeypatch.setattr(redteam_agent._batch, "submit", lambda reqs, metadata=None: submitted.append(reqs) or f"batch-{len(submitted)}")
+
+    # Without Redis the replies would die with the cron process: no submit, no collect
+    monkeypatch.setattr(redteam_agent, "_redis_client", lambda: None)
+    assert redteam_agent.submit_guard_patch_batch([{"max_position": 100}]) is None
+    assert not submitted
+
+    cli = _FakeRedis()
+    monkeypatch.setattr(redteam_agent, "_redis_client", lambda: cli)
+    assert redteam_agent.submit_guard_patch_batch([{"max_position": 100}]) == "batch-1"
+    key = next(iter(dict(submitted[0])))
+
+    # A second submit while batch-1 is still running must not orphan it
+    monkeypatch.setattr(redteam_agent._batch, "collect", lambda batch_id: None)
+    assert redteam_agent.submit_guard_patch_batch([{"max_position": 100}]) is None
+    assert json.loads(state.read_text())["batch_id"] == "batch-1"
+
+    reply = json.dumps({"patches": [{"path": "/max_position", "operation": "replace", "value": 150}]})
+    monkeypatch.setattr(redteam_agent._batch, "collect", lambda batch_id: {key: reply, "bogus": "{}"})
+    assert redteam_agent.collect_guard_patch_batch() == 1
+    assert cli.store == {key: reply}
+    assert not state.exists()
+
+    # A manager run without explicit filters reads the same FILTERS_JSON set and hits the reply
+    filters_path = tmp_path / "filters.json"
+    filters_path.write_text(json.dumps({"max_position": 100}))
+    monkeypatch.setenv("FILTERS_JSON", str(filters_path))
+    redteam_agent._local_cache.clear()
+    _, content = redteam_agent.produce()
+    redteam_agent._local_cache.clear()
+    assert yaml.safe_load(content)["patches"][0]["value"] == 150
+
+
+def test_async_path_keeps_redis_off_the_event_loop(monkeypatch):
+    import asyncio
+    import time
+
+    from brain.agents import redteam_agent
+
+    reply = json.dumps({"patches": [{"path": "/max_position", "operation": "replace", "value": 150}]})
+
+    class _SlowRedis(_FakeRedis):
+        def get(self, key):
+            time.sleep(0.2)  # blocking client call
+            return reply
+
+    monkeypatch.setattr(redteam_agent, "USE_LLM", True)
+    monkeypatch.setattr(redteam_agent, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(redteam_agent, "_redis_client", lambda: _SlowRedis())
+    redteam_agent._local_cache.clear()
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        result = await redteam_agent.suggest_guard_patches_async({"max_position": 100})
+        beat.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+    redteam_agent._local_cache.clear()
+    assert result["patches"][0]["value"] == 150  # served from the Redis tier
+    assert ticks >= 5  # the loop kept running while Redis blocked
@@ -0,0 +1,73 @@
+import os
+import time
+
+import orjson
+import pandas as pd  # type: ignore
+import pytest
+
+import model_performance_tuning as mpt
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(mpt, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def test_truncated_eval_cache_is_recomputed_and_rewritten(cache_dir):
+    calls = []
+
+    @mpt._disk_memoized
+    def evaluate(self, events):
+        calls.append(len(events))
+        return {"events": len(events)}
+
+    evaluator = mpt.ModelPerformanceEvaluator(seed=1)
+    events = pd.DataFrame({"holders_60": [1, 2, 3]})
+    assert evaluate(evaluator, events) == {"events": 3}
+    assert evaluate(evaluator, events) == {"events": 3}
+    assert calls == [3]  # second call served from disk
+
+    (path,) = cache_dir.glob("eval_*_evaluate.json")
+    path.write_bytes(path.read_bytes()[:5])  # interrupted write
+    assert evaluate(evaluator, events) == {"events": 3}
+    assert calls == [3, 3]
+    assert orjson.loads(path.read_bytes()) == {"events": 3}
+    assert sorted(p.name for p in cache_dir.iterdir()) == [path.name]  # no temp files left
+
+
+def test_write_atomic_keeps_previous_file_on_failure(cache_dir):
+    path = cache_dir / "market_data_x.parquet"
+    path.write_bytes(b"previous")
+
+    def failing_write(tmp):
+        with open(tmp, "wb") as fh:
+            fh.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        mpt._write_atomic(path, failing_write)
+    assert path.read_bytes() == b"previous"
+    assert sorted(p.name for p in cache_dir.iterdir()) == [path.name]
+
+    mpt._write_atomic(path, lambda tmp: open(tmp, "wb").write(b"new"))
+    assert path.read_bytes() == b"new"
+
+
+def test_evict_stale_cache_keeps_today(cache_dir):
+    stale = cache_dir / "market_data_old.parquet"
+    fresh = cache_dir / "market_data_new.parquet"
+    stale_eval = cache_dir / f"eval_v{mpt.EVAL_CACHE_VERSION}_old_evaluate.json"
+    fresh_eval = cache_dir / f"eval_v{mpt.EVAL_CACHE_VERSION}_new_evaluate.json"
+    old_version = cache_dir / f"eval_v{mpt.EVAL_CACHE_VERSION - 1}_new_evaluate.json"
+    other = cache_dir / "unrelated.json"
+    for p in (stale, fresh, stale_eval, fresh_eval, old_version, other):
+        p.write_bytes(b"x")
+    two_days_ago = time.time() - 2 * 24 * 60 * 60
+    for p in (stale, stale_eval, other):
+        os.utime(p, (two_days_ago, two_days_ago))
+
+    mpt._evict_stale_cache()
+    assert sorted(p.name for p in cache_dir.iterdir()) == sorted(
+        [fresh.name, fresh_eval.name, other.name]
+    )
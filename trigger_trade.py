@@ -5,10 +5,14 @@ Creates a simple trade signal to test if the executor will actually execute trad
 """
 
 import json
+import re
 import time
 import redis
 from datetime import datetime
 
+# Keys that might indicate execution (case-insensitive, single scan per key)
+_EXEC_PAT = re.compile(r"execution|transaction|trade", re.IGNORECASE)
+
 def trigger_test_trade():
     """Create a minimal trade signal to test executor execution"""
     print("🎯 TRIGGERING TEST TRADE")
@@ -23,12 +27,19 @@ def trigger_test_trade():
         print(f"❌ Redis connection failed: {e}")
         return False
     
+    # One timestamp for everything this run creates
+    now_iso = datetime.now().isoformat()
+
+    # Queue every write below and send them in one round-trip before reading
+    # the state back.
+    pipe = r.pipeline(transaction=False)
+
     # 1. Set up minimal risk parameters for testing
     print("\n📋 Setting up test risk parameters...")
-    r.set('risk:equity_floor', '1')  # Minimal equity requirement
-    r.set('risk:max_position_size', '10')  # Small position size in USDC
-    r.set('risk:max_slippage', '5.0')  # 5% max slippage
-    r.set('global_halt', '0')  # Make sure trading is enabled
+    pipe.set('risk:equity_floor', '1')  # Minimal equity requirement
+    pipe.set('risk:max_position_size', '10')  # Small position size in USDC
+    pipe.set('risk:max_slippage', '5.0')  # 5% max slippage
+    pipe.set('global_halt', '0')  # Make sure trading is enabled
     
     # 2. Create a simple WASM-like configuration (simulated)
     print("📦 Creating mock trading model...")
@@ -39,10 +50,10 @@ def trigger_test_trade():
         "action": "buy",
         "amount_usdc": "5",  # Small test amount
         "max_slippage": "3.0",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso
     }
     
-    r.set('current_model', json.dumps(mock_wasm_config))
+    pipe.set('current_model', json.dumps(mock_wasm_config))
     
     # 3. Create a trade signal
     print("📊 Creating trade signal...")
@@ -54,14 +65,15 @@ def trigger_test_trade():
         "amount_usdc": 5,
         "max_slippage_bps": 300,  # 3%
         "reason": "Manual test trade for meme coin system validation",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now_iso,
         "source": "manual_test"
     }
     
-    # Push to different queues the executor might be watching
-    r.lpush('trade_signals', json.dumps(trade_signal))
-    r.lpush('agent_output', json.dumps(trade_signal))
-    r.set('latest_signal', json.dumps(trade_signal))
+    # Push to different queues the executor might be watching (encoded once)
+    signal_payload = json.dumps(trade_signal)
+    pipe.lpush('trade_signals', signal_payload)
+    pipe.lpush('agent_output', signal_payload)
+    pipe.set('latest_signal', signal_payload)
     
     # 4. Create config update that might trigger execution
     print("⚙️ Creating configuration update...")
@@ -69,11 +81,13 @@ def trigger_test_trade():
         "update_type": "trade_signal",
         "enabled": True,
         "signal": trade_signal,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": now_iso
     }
     
-    r.lpush('config_updates', json.dumps(config_update))
+    pipe.lpush('config_updates', json.dumps(config_update))
     
+    pipe.execute()
+
     # 5. Check what we've created
     print("\n📊 Current Redis state:")
     keys = r.keys('*')
@@ -115,10 +129,16 @@ def monitor_execution():
     print("Watching for 60 seconds...")
     start_time = time.time()
     
-    while time.time() - start_time < 60:
-        # Check for any new keys that might indicate execution
-        keys = r.keys('*')
-        execution_keys = [k for k in keys if 'execution' in k.lower() or 'transaction' in k.lower() or 'trade' in k.lower()]
+    while True:
+        # One clock read per iteration, reused for the deadline and the display
+        elapsed = time.time() - start_time
+        if elapsed >= 60:
+            break
+        # Check for any new keys that might indicate execution.
+        # SCAN walks the keyspace in small cursor steps instead of blocking
+        # Redis with one O(N) KEYS call every poll.
+        keys = r.scan_iter(count=500)
+        execution_keys = [k for k in keys if _EXEC_PAT.search(k)]
         
         if execution_keys:
             print(f"\n🔍 Found potential execution keys: {execution_keys}")
@@ -131,12 +151,12 @@ def monitor_execution():
         output_count = r.llen('agent_output')
         config_count = r.llen('config_updates')
         
-        print(f"\r⏱️  {int(time.time() - start_time)}s - Signals: {signal_count}, Outputs: {output_count}, Configs: {config_count}", end='', flush=True)
+        print(f"\r⏱️  {int(elapsed)}s - Signals: {signal_count}, Outputs: {output_count}, Configs: {config_count}", end='', flush=True)
         
         time.sleep(2)
     
     print("\n\n📊 Final Redis state:")
-    keys = r.keys('*')
+    keys = r.scan_iter(count=500)
     for key in sorted(keys):
         value = r.get(key)
         if key in ['trade_signals', 'agent_output', 'config_updates']: